@@ -10,7 +10,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from app.database import Base
-from app.models import user, identity, account, signup_script, api_key
+from app.models import user, identity, account, signup_script, api_key, job_checkpoint, revoked_token, refresh_session, machine_key
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,35 @@
+"""Add compact encrypted record column to identities
+
+Existing rows keep their per-field columns until they are converted by
+app.jobs.compact_identities, which needs the owner's key and therefore runs
+in batches after the user's next login rather than inside this migration.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return column in {col["name"] for col in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    # Tables may already have been created from the models by create_tables()
+    if not _has_column("identities", "encrypted_record"):
+        op.add_column("identities", sa.Column("encrypted_record", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("identities", "encrypted_record")
@@ -0,0 +1,41 @@
+"""Add job_checkpoints table for resumable background jobs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables may already have been created from the models by create_tables()
+    if sa.inspect(op.get_bind()).has_table("job_checkpoints"):
+        return
+
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_name", sa.String(length=100), nullable=False),
+        sa.Column("scope", sa.String(length=200), nullable=False),
+        sa.Column("last_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("state", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("job_name", "scope", name="uq_job_checkpoints_job_scope"),
+    )
+    op.create_index("ix_job_checkpoints_id", "job_checkpoints", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_checkpoints_id", table_name="job_checkpoints")
+    op.drop_table("job_checkpoints")
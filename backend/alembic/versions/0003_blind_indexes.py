@@ -0,0 +1,44 @@
+"""Add blind-index columns for searching encrypted emails, usernames and phones
+
+Values are keyed per user, so they are filled by app.jobs.blind_index_backfill
+after each user's next login rather than inside this migration.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+BLIND_INDEXES = {
+    "identities": ["email_bidx", "phone_bidx"],
+    "accounts": ["email_bidx", "username_bidx"],
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in BLIND_INDEXES.items():
+        # Tables may already have been created from the models by create_tables()
+        existing_columns = {col["name"] for col in inspector.get_columns(table)}
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table)}
+        for column in columns:
+            if column not in existing_columns:
+                op.add_column(table, sa.Column(column, sa.String(length=64), nullable=True))
+            if f"ix_{table}_{column}" not in existing_indexes:
+                op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def downgrade() -> None:
+    for table, columns in BLIND_INDEXES.items():
+        for column in columns:
+            op.drop_index(f"ix_{table}_{column}", table_name=table)
+            op.drop_column(table, column)
@@ -0,0 +1,39 @@
+"""Index foreign keys used by listings and ownership checks
+
+identities.user_id and accounts.identity_id are covered by the leading
+column of the (user_id, id) and (identity_id, website_domain) composites.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_identities_user_id_id", "identities", ["user_id", "id"]),
+    ("ix_accounts_identity_id_website_domain", "accounts", ["identity_id", "website_domain"]),
+    ("ix_accounts_signup_script_id", "accounts", ["signup_script_id"]),
+    ("ix_api_keys_account_id", "api_keys", ["account_id"]),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        # Tables may already have been created from the models by create_tables()
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
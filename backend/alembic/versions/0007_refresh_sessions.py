@@ -0,0 +1,46 @@
+"""Add refresh_sessions table for rotating refresh tokens
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables may already have been created from the models by create_tables()
+    if sa.inspect(op.get_bind()).has_table("refresh_sessions"):
+        return
+
+    op.create_table(
+        "refresh_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("token_hash", sa.String(length=64), nullable=False),
+        sa.Column("family_id", sa.String(length=32), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("rotated_at", sa.DateTime(timezone=True)),
+        sa.Column("revoked_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_refresh_sessions_id", "refresh_sessions", ["id"])
+    op.create_index("ix_refresh_sessions_user_id", "refresh_sessions", ["user_id"])
+    op.create_index("ix_refresh_sessions_token_hash", "refresh_sessions", ["token_hash"], unique=True)
+    op.create_index("ix_refresh_sessions_family_id", "refresh_sessions", ["family_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_sessions_family_id", table_name="refresh_sessions")
+    op.drop_index("ix_refresh_sessions_token_hash", table_name="refresh_sessions")
+    op.drop_index("ix_refresh_sessions_user_id", table_name="refresh_sessions")
+    op.drop_index("ix_refresh_sessions_id", table_name="refresh_sessions")
+    op.drop_table("refresh_sessions")
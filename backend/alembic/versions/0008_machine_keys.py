@@ -0,0 +1,48 @@
+"""Add machine_keys table for API key authentication
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables may already have been created from the models by create_tables()
+    if sa.inspect(op.get_bind()).has_table("machine_keys"):
+        return
+
+    op.create_table(
+        "machine_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("prefix", sa.String(length=16), nullable=False),
+        sa.Column("secret_hash", sa.String(length=64), nullable=False),
+        sa.Column("wrapped_data_key", sa.Text(), nullable=False),
+        sa.Column("last_used", sa.DateTime(timezone=True)),
+        sa.Column("usage_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("expires_at", sa.DateTime(timezone=True)),
+        sa.Column("revoked_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_machine_keys_id", "machine_keys", ["id"])
+    op.create_index("ix_machine_keys_user_id", "machine_keys", ["user_id"])
+    op.create_index("ix_machine_keys_prefix", "machine_keys", ["prefix"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_machine_keys_prefix", table_name="machine_keys")
+    op.drop_index("ix_machine_keys_user_id", table_name="machine_keys")
+    op.drop_index("ix_machine_keys_id", table_name="machine_keys")
+    op.drop_table("machine_keys")
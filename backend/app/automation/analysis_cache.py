@@ -0,0 +1,291 @@
+"""
+Cache of signup page analyses keyed by normalized domain.
+
+Analyzing a page means fetching it, and often navigating a browser to it
+(see static_analyzer), so results are kept in an in-memory LRU and
+persisted to the domain's SignupScript row (``form_selectors``,
+``required_fields``, ``optional_fields``, ``captcha_present``, with the
+full analysis in ``learning_data``). Repeat analyses of a domain within
+ANALYSIS_CACHE_TTL_SECONDS are served from memory, or from the database
+after a restart or on another worker. The cache reads and writes through
+its own short-lived sessions, so no database connection is held while a
+page is analyzed and callers' sessions are never committed.
+
+Each stored analysis carries a structural hash of its form (fields, types,
+selectors, captcha). A persisted entry whose hash does not match its
+contents is ignored. When an expired entry is re-analyzed, an unchanged
+hash keeps the script's version, and a changed one marks the site's signup
+form as changed and bumps the version.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from app.automation.static_analyzer import get_tiered_analyzer
+from app.automation.web_scraper import FormField, SignupFormAnalysis
+from app.database import async_session_maker
+from app.models.signup_script import SignupScript
+from app.utils.logging import get_logger, log_automation_event
+
+logger = get_logger(__name__)
+
+Analyzer = Callable[[str], Awaitable[SignupFormAnalysis]]
+
+
+def normalize_domain(url: str) -> str:
+    """Reduce a URL (or bare host) to a cache key: lowercase host without www. or port."""
+    parsed = urlparse(url if "//" in url else f"//{url}")
+    host = (parsed.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    return host.lower()
+
+
+def analysis_to_dict(analysis: SignupFormAnalysis) -> Dict[str, Any]:
+    return asdict(analysis)
+
+
+def analysis_from_dict(data: Dict[str, Any]) -> SignupFormAnalysis:
+    data = dict(data)
+    data["fields"] = [FormField(**field) for field in data.get("fields") or []]
+    return SignupFormAnalysis(**data)
+
+
+def structural_hash(analysis: SignupFormAnalysis) -> str:
+    """Hash the parts of an analysis that describe the form's structure."""
+    structure = {
+        "form": analysis.form_selector,
+        "method": (analysis.method or "").lower(),
+        "submit": analysis.submit_button_selector,
+        "captcha": analysis.has_captcha,
+        "terms": analysis.has_terms_checkbox,
+        "fields": sorted(
+            [field.name, field.type, field.selector, field.required, sorted(field.options or [])]
+            for field in analysis.fields
+        ),
+    }
+    return hashlib.sha256(json.dumps(structure, sort_keys=True).encode()).hexdigest()
+
+
+class AnalysisCache:
+    """LRU + TTL cache of signup analyses, persisted to signup_scripts."""
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl_seconds: float = 86400.0,
+        session_factory: async_sessionmaker = async_session_maker,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[str, Tuple[SignupFormAnalysis, str, float]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.memory_hits = 0
+        self.database_hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.changed = 0
+
+    def _get_memory(self, domain: str) -> Optional[SignupFormAnalysis]:
+        entry = self._entries.get(domain)
+        if entry is None:
+            return None
+        if time.time() - entry[2] > self.ttl_seconds:
+            del self._entries[domain]
+            return None
+        self._entries.move_to_end(domain)
+        return entry[0]
+
+    def _put_memory(self, domain: str, analysis: SignupFormAnalysis, digest: str, analyzed_at: float):
+        self._entries[domain] = (analysis, digest, analyzed_at)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _load_script(self, session: AsyncSession, domain: str) -> Optional[SignupScript]:
+        result = await session.execute(
+            select(SignupScript)
+            .where(SignupScript.website_domain == domain)
+            .order_by(SignupScript.id.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    def _stored_analysis(script: Optional[SignupScript]) -> Optional[Tuple[SignupFormAnalysis, str, float]]:
+        """Return a persisted analysis if present and consistent with its structural hash."""
+        data = (script.learning_data or {}) if script is not None else {}
+        if "analysis" not in data:
+            return None
+        try:
+            analysis = analysis_from_dict(data["analysis"])
+        except (TypeError, KeyError):
+            return None
+        digest = data.get("structural_hash")
+        if digest != structural_hash(analysis):
+            return None
+        return analysis, digest, float(data.get("analyzed_at", 0))
+
+    async def get_or_analyze(
+        self,
+        url: str,
+        analyzer: Optional[Analyzer] = None,
+        force: bool = False,
+    ) -> Tuple[SignupFormAnalysis, str]:
+        """
+        Return the analysis for a URL's domain, analyzing it only when needed.
+
+        Concurrent requests for the same domain share one analysis.
+
+        Args:
+            url: Page to analyze
+            analyzer: Coroutine producing the analysis (defaults to the tiered analyzer)
+            force: Ignore cached results
+
+        Returns:
+            The analysis and where it came from: "memory", "database" or "analyzed"
+        """
+        domain = normalize_domain(url)
+        if not force:
+            analysis = self._get_memory(domain)
+            if analysis is not None:
+                self.memory_hits += 1
+                return analysis, "memory"
+
+        while True:
+            in_flight = self._in_flight.get(domain)
+            if in_flight is None:
+                break
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # Only retry if the leader was cancelled, not this request
+                if not in_flight.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[domain] = future
+        try:
+            result = await self._load_or_analyze(domain, url, analyzer, force)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            # A cancelled leader must not leave waiters hanging; they retry
+            if not future.done():
+                future.cancel()
+            del self._in_flight[domain]
+
+    async def _load_or_analyze(
+        self, domain: str, url: str, analyzer: Optional[Analyzer], force: bool
+    ) -> Tuple[SignupFormAnalysis, str]:
+        async with self.session_factory() as session:
+            stored = self._stored_analysis(await self._load_script(session, domain))
+        if stored is not None and not force and time.time() - stored[2] <= self.ttl_seconds:
+            self.database_hits += 1
+            self._put_memory(domain, *stored)
+            return stored[0], "database"
+
+        self.misses += 1
+        analysis = await (analyzer or get_tiered_analyzer().analyze)(url)
+        digest = structural_hash(analysis)
+        analyzed_at = time.time()
+
+        async with self.session_factory() as session:
+            # Reload: another worker may have stored this domain during the analysis
+            script = await self._load_script(session, domain)
+            stored = self._stored_analysis(script)
+            if script is None:
+                script = SignupScript(
+                    website_name=domain,
+                    website_url=url,
+                    website_domain=domain,
+                    script_content="",
+                )
+                session.add(script)
+            elif stored is not None and stored[1] == digest:
+                self.revalidated += 1
+            elif stored is not None:
+                self.changed += 1
+                script.version = _bump_version(script.version)
+                log_automation_event("signup_form_changed", {"domain": domain, "version": script.version}, url)
+
+            script.website_url = url
+            script.form_selectors = {
+                "form": analysis.form_selector,
+                "submit": analysis.submit_button_selector,
+                "fields": {field.name: field.selector for field in analysis.fields},
+            }
+            script.required_fields = [field.name for field in analysis.fields if field.required]
+            script.optional_fields = [field.name for field in analysis.fields if not field.required]
+            script.captcha_present = analysis.has_captcha
+            script.email_verification_required = analysis.requires_email_verification
+            script.learning_data = {
+                **(script.learning_data or {}),
+                "analysis": analysis_to_dict(analysis),
+                "structural_hash": digest,
+                "analyzed_at": analyzed_at,
+            }
+            await session.commit()
+
+        self._put_memory(domain, analysis, digest, analyzed_at)
+        return analysis, "analyzed"
+
+    def invalidate(self, url: str):
+        """Drop a domain from memory (the persisted entry is replaced on next analysis)."""
+        self._entries.pop(normalize_domain(url), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and hit counters."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "memory_hits": self.memory_hits,
+            "database_hits": self.database_hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "changed": self.changed,
+        }
+
+
+def _bump_version(version: Optional[str]) -> str:
+    parts = (version or "1.0.0").split(".")
+    try:
+        parts[-1] = str(int(parts[-1]) + 1)
+    except ValueError:
+        parts.append("1")
+    return ".".join(parts)
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get the process-wide analysis cache."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache(
+            max_size=int(os.getenv("ANALYSIS_CACHE_MAX_SIZE", "1000")),
+            ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400")),
+        )
+    return _analysis_cache
@@ -0,0 +1,303 @@
+"""
+Long-lived pool of Chromium browsers and isolated browser contexts.
+
+Launching Chromium costs seconds; opening a page in an existing context costs
+milliseconds. The pool starts one Playwright driver and BROWSER_POOL_SIZE
+browsers on first use, each with BROWSER_POOL_CONTEXTS contexts. Analyses
+borrow a context, open a page, and hand the context back with its cookies
+cleared.
+
+A context is replaced after BROWSER_POOL_MAX_PAGES pages, or when a page
+fails, so leaks and bad state do not build up. A background health check
+relaunches browsers that have disconnected, and the app lifespan closes
+the pool on shutdown.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BrowserPoolTimeout(Exception):
+    """Raised when no browser context becomes free within the acquire timeout."""
+
+
+class _BrowserSlot:
+    """A pooled browser; ``generation`` changes whenever it is relaunched."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.generation = 0
+        self.lock = asyncio.Lock()
+
+
+class PooledContext:
+    """A browser context lent out by the pool."""
+
+    def __init__(self, browser_slot: _BrowserSlot):
+        self.browser_slot = browser_slot
+        self.context: Optional[BrowserContext] = None
+        self.generation = -1
+        self.pages_used = 0
+        self.broken = False
+
+
+class BrowserPool:
+    """Pool of browsers with isolated contexts, acquired and released asynchronously."""
+
+    def __init__(
+        self,
+        browsers: int = 1,
+        contexts_per_browser: int = 4,
+        max_pages_per_context: int = 50,
+        headless: bool = True,
+        acquire_timeout: float = 30.0,
+        health_check_seconds: float = 30.0,
+    ):
+        """
+        Initialize the pool (browsers are launched on first use).
+
+        Args:
+            browsers: Number of Chromium processes
+            contexts_per_browser: Isolated contexts per browser, i.e. concurrent pages
+            max_pages_per_context: Pages opened in a context before it is replaced
+            headless: Launch browsers headless
+            acquire_timeout: Seconds to wait for a free context
+            health_check_seconds: Interval between browser health checks
+        """
+        self.headless = headless
+        self.max_pages_per_context = max_pages_per_context
+        self.acquire_timeout = acquire_timeout
+        self.health_check_seconds = health_check_seconds
+        self._browser_slots = [_BrowserSlot(i) for i in range(browsers)]
+        self._contexts = [
+            PooledContext(browser_slot)
+            for browser_slot in self._browser_slots
+            for _ in range(contexts_per_browser)
+        ]
+        self._playwright: Optional[Playwright] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.timeouts = 0
+        self.browser_launches = 0
+        self.contexts_created = 0
+        self.contexts_recycled = 0
+        self.total_acquire_wait = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        """Start the Playwright driver and launch the browsers (idempotent)."""
+        async with self._start_lock:
+            if self.started:
+                return
+            self._playwright = await async_playwright().start()
+            try:
+                for browser_slot in self._browser_slots:
+                    await self._launch(browser_slot)
+            except Exception:
+                await self.close()
+                raise
+            self._idle = asyncio.Queue()
+            for pooled in self._contexts:
+                self._idle.put_nowait(pooled)
+            self._health_task = asyncio.create_task(self._health_loop())
+            logger.info(
+                f"Browser pool started with {len(self._browser_slots)} browser(s), "
+                f"{len(self._contexts)} context(s)"
+            )
+
+    async def _launch(self, browser_slot: _BrowserSlot):
+        """(Re)launch the browser of a slot; its contexts are recreated lazily."""
+        if browser_slot.browser is not None:
+            try:
+                await browser_slot.browser.close()
+            except Exception:
+                pass
+        browser_slot.browser = await self._playwright.chromium.launch(headless=self.headless)
+        browser_slot.generation += 1
+        self.browser_launches += 1
+
+    async def _ensure_healthy(self, pooled: PooledContext):
+        """Make sure a context is usable before lending it out."""
+        browser_slot = pooled.browser_slot
+        async with browser_slot.lock:
+            if browser_slot.browser is None or not browser_slot.browser.is_connected():
+                logger.warning(f"Browser {browser_slot.index} disconnected, relaunching")
+                await self._launch(browser_slot)
+
+        recycle = (
+            pooled.broken
+            or pooled.pages_used >= self.max_pages_per_context
+            or pooled.generation != browser_slot.generation
+        )
+        if pooled.context is not None and recycle:
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+            pooled.context = None
+            self.contexts_recycled += 1
+        if pooled.context is None:
+            pooled.context = await browser_slot.browser.new_context()
+            pooled.generation = browser_slot.generation
+            pooled.pages_used = 0
+            pooled.broken = False
+            self.contexts_created += 1
+
+    async def acquire(self, timeout: Optional[float] = None) -> PooledContext:
+        """
+        Borrow a browser context, starting the pool if needed.
+
+        Raises:
+            BrowserPoolTimeout: If no context is free within the timeout
+        """
+        if not self.started:
+            await self.start()
+
+        started_at = time.perf_counter()
+        try:
+            pooled = await asyncio.wait_for(self._idle.get(), timeout or self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise BrowserPoolTimeout("No browser context available")
+        self.total_acquire_wait += time.perf_counter() - started_at
+
+        try:
+            await self._ensure_healthy(pooled)
+        except Exception:
+            pooled.broken = True
+            self._idle.put_nowait(pooled)
+            raise
+        self.acquired += 1
+        return pooled
+
+    async def release(self, pooled: PooledContext):
+        """Return a borrowed context to the pool."""
+        if not pooled.broken and pooled.context is not None:
+            try:
+                await pooled.context.clear_cookies()
+            except Exception:
+                pooled.broken = True
+        self._idle.put_nowait(pooled)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Open a page in a pooled context and give the context back afterwards."""
+        pooled = await self.acquire()
+        page = None
+        try:
+            page = await pooled.context.new_page()
+            pooled.pages_used += 1
+            yield page
+        except Exception:
+            # Don't trust a context whose page failed; it is replaced on next use
+            pooled.broken = True
+            raise
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pooled.broken = True
+            await self.release(pooled)
+
+    async def health_check(self) -> List[bool]:
+        """Relaunch disconnected browsers; return which browsers were healthy."""
+        healthy = []
+        for browser_slot in self._browser_slots:
+            async with browser_slot.lock:
+                ok = browser_slot.browser is not None and browser_slot.browser.is_connected()
+                if not ok:
+                    logger.warning(f"Browser {browser_slot.index} failed health check, relaunching")
+                    try:
+                        await self._launch(browser_slot)
+                    except Exception as e:
+                        logger.error(f"Error relaunching browser {browser_slot.index}: {str(e)}")
+            healthy.append(ok)
+        return healthy
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_seconds)
+            try:
+                await self.health_check()
+            except Exception as e:
+                logger.error(f"Browser pool health check failed: {str(e)}")
+
+    async def close(self):
+        """Close every context and browser and stop the Playwright driver."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for pooled in self._contexts:
+            if pooled.context is not None:
+                try:
+                    await pooled.context.close()
+                except Exception:
+                    pass
+                pooled.context = None
+        for browser_slot in self._browser_slots:
+            if browser_slot.browser is not None:
+                try:
+                    await browser_slot.browser.close()
+                except Exception:
+                    pass
+                browser_slot.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._idle = None
+        logger.info("Browser pool closed")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size and usage counters."""
+        return {
+            "started": self.started,
+            "browsers": len(self._browser_slots),
+            "contexts": len(self._contexts),
+            "idle_contexts": self._idle.qsize() if self._idle is not None else len(self._contexts),
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "browser_launches": self.browser_launches,
+            "contexts_created": self.contexts_created,
+            "contexts_recycled": self.contexts_recycled,
+            "avg_acquire_wait_ms": self.total_acquire_wait / self.acquired * 1000 if self.acquired else 0.0,
+        }
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get the process-wide browser pool (browsers launch on first acquire)."""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            browsers=int(os.getenv("BROWSER_POOL_SIZE", "1")),
+            contexts_per_browser=int(os.getenv("BROWSER_POOL_CONTEXTS", "4")),
+            max_pages_per_context=int(os.getenv("BROWSER_POOL_MAX_PAGES", "50")),
+            headless=os.getenv("BROWSER_HEADLESS", "true").lower() in ("1", "true", "yes", "on"),
+            acquire_timeout=float(os.getenv("BROWSER_POOL_ACQUIRE_TIMEOUT", "30")),
+            health_check_seconds=float(os.getenv("BROWSER_POOL_HEALTH_SECONDS", "30")),
+        )
+    return _browser_pool
+
+
+async def close_browser_pool():
+    """Close the browser pool if it was started."""
+    if _browser_pool is not None and _browser_pool.started:
+        await _browser_pool.close()
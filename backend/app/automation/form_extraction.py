@@ -0,0 +1,207 @@
+"""
+Signup form extraction.
+
+EXTRACT_FORMS_SCRIPT runs inside the page in a single ``page.evaluate``
+call. It collects every form (plus inputs that sit outside any form), with
+each field's name, type, a CSS selector, required flag, placeholder,
+label, pattern and options, and the submit button, captcha and terms
+checkbox. It scores each form on how much it looks like a signup form.
+Doing this in the page avoids one Playwright round trip per element.
+
+analysis_from_extraction turns that result into a SignupFormAnalysis for
+the best-scoring form.
+"""
+from typing import Any, Dict, List, Optional
+
+from app.automation.web_scraper import FormField, SignupFormAnalysis
+
+EXTRACT_FORMS_SCRIPT = r"""
+() => {
+  const SKIP_TYPES = new Set(["hidden", "submit", "button", "image", "reset", "search"]);
+  const SIGNUP = /sign\s*up|register|create\s+(an?\s+|your\s+)?account|join|get\s+started/i;
+  const LOGIN = /log\s*in|sign\s*in/i;
+  const TERMS = /terms|privacy|agree|conditions/i;
+  const VERIFY = /verify your email|confirmation (email|link)|we('ll| will) (send|email) you/i;
+  const CAPTCHA = 'iframe[src*="recaptcha"], iframe[src*="hcaptcha"], iframe[src*="challenges.cloudflare.com"], ' +
+                  '.g-recaptcha, .h-captcha, .cf-turnstile, [data-sitekey]';
+
+  const clean = (value) => (value || "").replace(/\s+/g, " ").trim();
+  const textOf = (el) => clean(el ? el.textContent : "");
+  const quote = (value) => '"' + value.replace(/\\/g, "\\\\").replace(/"/g, '\\"') + '"';
+  const isUnique = (selector) => document.querySelectorAll(selector).length === 1;
+
+  const selectorFor = (el, scopeSelector) => {
+    if (el.id && isUnique("#" + CSS.escape(el.id))) return "#" + CSS.escape(el.id);
+    const tag = el.tagName.toLowerCase();
+    const name = el.getAttribute("name");
+    if (name) {
+      const byName = `${tag}[name=${quote(name)}]`;
+      if (isUnique(byName)) return byName;
+      if (scopeSelector && isUnique(`${scopeSelector} ${byName}`)) return `${scopeSelector} ${byName}`;
+    }
+    const parts = [];
+    for (let node = el; node && node.nodeType === 1 && node !== document.body; node = node.parentElement) {
+      if (node !== el && node.id && isUnique("#" + CSS.escape(node.id))) {
+        parts.unshift("#" + CSS.escape(node.id));
+        return parts.join(" > ");
+      }
+      const siblings = Array.from(node.parentElement.children).filter((s) => s.tagName === node.tagName);
+      const nodeTag = node.tagName.toLowerCase();
+      parts.unshift(siblings.length > 1 ? `${nodeTag}:nth-of-type(${siblings.indexOf(node) + 1})` : nodeTag);
+    }
+    return ["body"].concat(parts).join(" > ");
+  };
+
+  const labelFor = (el) => {
+    if (el.labels && el.labels.length) {
+      // Text of the label without the control's own text (e.g. select options)
+      const label = el.labels[0].cloneNode(true);
+      label.querySelectorAll("input, select, textarea").forEach((control) => control.remove());
+      const text = textOf(label);
+      if (text) return text;
+    }
+    if (el.getAttribute("aria-label")) return clean(el.getAttribute("aria-label"));
+    const labelledBy = el.getAttribute("aria-labelledby");
+    if (labelledBy) {
+      return clean(labelledBy.split(/\s+/).map((id) => textOf(document.getElementById(id))).join(" "));
+    }
+    return "";
+  };
+
+  const isRequired = (el) => el.required || el.getAttribute("aria-required") === "true";
+
+  const fieldsOf = (controls, scopeSelector) => {
+    const fields = [];
+    const radioGroups = {};
+    for (const el of controls) {
+      const tag = el.tagName.toLowerCase();
+      if (!["input", "select", "textarea"].includes(tag)) continue;
+      const type = tag === "input" ? (el.getAttribute("type") || "text").toLowerCase() : tag;
+      if (SKIP_TYPES.has(type) || el.disabled) continue;
+
+      const label = labelFor(el);
+      const name = el.getAttribute("name") || el.id || clean(label).toLowerCase().replace(/[^a-z0-9]+/g, "_") || type;
+      if (type === "radio") {
+        let group = radioGroups[name];
+        if (!group) {
+          group = radioGroups[name] = {
+            name, type, required: false, placeholder: "", label: "", pattern: "", options: [],
+            selector: scopeSelector && !isUnique(`input[name=${quote(name)}]`)
+              ? `${scopeSelector} input[name=${quote(name)}]` : `input[name=${quote(name)}]`,
+          };
+          fields.push(group);
+        }
+        group.required = group.required || isRequired(el);
+        group.options.push(label || el.value);
+        continue;
+      }
+
+      fields.push({
+        name,
+        type,
+        selector: selectorFor(el, scopeSelector),
+        required: isRequired(el),
+        placeholder: el.getAttribute("placeholder") || "",
+        label,
+        pattern: el.getAttribute("pattern") || "",
+        options: tag === "select"
+          ? Array.from(el.options).filter((option) => option.value !== "").map((option) => textOf(option) || option.value)
+          : null,
+      });
+    }
+    return fields;
+  };
+
+  const submitOf = (container, scopeSelector) => {
+    const button = container.querySelector('button[type="submit"], input[type="submit"], button:not([type])') ||
+                   Array.from(container.querySelectorAll('button, [role="button"]')).find((b) => SIGNUP.test(textOf(b)));
+    if (!button) return { selector: "", text: "" };
+    return { selector: selectorFor(button, scopeSelector), text: textOf(button) || button.value || "" };
+  };
+
+  const score = (container, fields, submit) => {
+    const passwords = fields.filter((field) => field.type === "password").length;
+    const context = [container.id, container.className, container.getAttribute("action"), submit.text,
+                     textOf(container.closest("section, article, main, div") || container).slice(0, 500)].join(" ");
+    let value = Math.min(fields.length, 5);
+    value += Math.min(passwords, 2) * 3;
+    if (fields.some((field) => field.type === "email" || /e-?mail/i.test(field.name))) value += 2;
+    if (SIGNUP.test(submit.text) || SIGNUP.test(context)) value += 3;
+    if (LOGIN.test(submit.text) && !SIGNUP.test(submit.text)) value -= 4;
+    return value;
+  };
+
+  const describe = (container, controls, selector, action, method) => {
+    const fields = fieldsOf(controls, selector);
+    const submit = submitOf(container, selector);
+    const terms = fields.some((field) => field.type === "checkbox" && TERMS.test(field.label + " " + field.name));
+    return { selector, action, method, fields, submit_selector: submit.selector, has_terms_checkbox: terms,
+             score: score(container, fields, submit) };
+  };
+
+  const forms = [];
+  for (const form of Array.from(document.forms)) {
+    const selector = selectorFor(form, "");
+    const entry = describe(form, Array.from(form.elements), selector, form.action || "", (form.getAttribute("method") || "get").toLowerCase());
+    if (entry.fields.length) forms.push(entry);
+  }
+
+  // Many single-page apps render inputs without a <form>
+  const loose = Array.from(document.querySelectorAll("input, select, textarea")).filter((el) => !el.form);
+  if (loose.length) {
+    const entry = describe(document.body, loose, "", "", "post");
+    entry.selector = "body";
+    if (entry.fields.length) forms.push(entry);
+  }
+
+  return {
+    forms,
+    has_captcha: document.querySelector(CAPTCHA) !== null,
+    requires_email_verification: VERIFY.test(document.body ? document.body.innerText || "" : ""),
+  };
+}
+"""
+
+
+def _form_field(field: Dict[str, Any]) -> FormField:
+    return FormField(
+        name=field["name"],
+        type=field["type"],
+        selector=field["selector"],
+        required=bool(field["required"]),
+        placeholder=field.get("placeholder") or "",
+        label=field.get("label") or "",
+        validation_pattern=field.get("pattern") or "",
+        options=field.get("options"),
+    )
+
+
+def best_form(extraction: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the extracted form that looks most like a signup form, or None."""
+    forms: List[Dict[str, Any]] = extraction.get("forms") or []
+    if not forms:
+        return None
+    # The first form wins ties, matching document order
+    return max(forms, key=lambda form: form["score"])
+
+
+def analysis_from_extraction(extraction: Dict[str, Any]) -> SignupFormAnalysis:
+    """
+    Build a SignupFormAnalysis from the result of EXTRACT_FORMS_SCRIPT.
+
+    A page without any form fields yields an analysis with no fields.
+    """
+    form = best_form(extraction) or {
+        "selector": "", "action": "", "method": "post", "fields": [], "submit_selector": "",
+        "has_terms_checkbox": False,
+    }
+    return SignupFormAnalysis(
+        form_selector=form["selector"],
+        action_url=form["action"],
+        method=form["method"],
+        fields=[_form_field(field) for field in form["fields"]],
+        submit_button_selector=form["submit_selector"],
+        has_captcha=bool(extraction.get("has_captcha")),
+        has_terms_checkbox=bool(form["has_terms_checkbox"]),
+        requires_email_verification=bool(extraction.get("requires_email_verification")),
+    )
@@ -0,0 +1,405 @@
+"""
+Tiered signup page analysis: static HTML first, headless browser second.
+
+Most signup pages are server-rendered, so TieredAnalyzer first fetches the
+page with a pooled httpx.AsyncClient and extracts forms from the HTML with
+BeautifulSoup/lxml. extract_forms_static mirrors EXTRACT_FORMS_SCRIPT and
+produces the same structure. The browser pool is only used when the static
+tier cannot be trusted:
+
+- the fetch failed or returned an error status or non-HTML content
+- no form fields were found
+- the page looks script-rendered (an empty app root or a noscript
+  warning) and the best form has no email or password field
+
+Every analysis records which tier served it, and the analyzer counts
+escalations by reason. The HTTP transport and the browser analyzer can be
+injected, e.g. to run against a local fixture server.
+"""
+import asyncio
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup, Tag
+
+from app.automation.form_extraction import analysis_from_extraction, best_form
+from app.automation.web_scraper import SignupFormAnalysis, analyze_website_signup
+from app.utils.logging import get_logger, log_automation_event
+
+logger = get_logger(__name__)
+
+SKIP_TYPES = {"hidden", "submit", "button", "image", "reset", "search"}
+SIGNUP_RE = re.compile(r"sign\s*up|register|create\s+(an?\s+|your\s+)?account|join|get\s+started", re.I)
+LOGIN_RE = re.compile(r"log\s*in|sign\s*in", re.I)
+TERMS_RE = re.compile(r"terms|privacy|agree|conditions", re.I)
+VERIFY_RE = re.compile(r"verify your email|confirmation (email|link)|we('ll| will) (send|email) you", re.I)
+CAPTCHA_SELECTOR = (
+    'iframe[src*="recaptcha"], iframe[src*="hcaptcha"], iframe[src*="challenges.cloudflare.com"], '
+    '.g-recaptcha, .h-captcha, .cf-turnstile, [data-sitekey]'
+)
+APP_ROOT_SELECTOR = "#root, #app, #__next, #__nuxt, [data-reactroot], app-root"
+SIMPLE_ID_RE = re.compile(r"-?[A-Za-z_][\w-]*")
+
+
+def _clean(text: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def _text(el: Optional[Tag]) -> str:
+    return _clean(el.get_text(" ")) if el is not None else ""
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _is_unique(soup: BeautifulSoup, selector: str) -> bool:
+    return len(soup.select(selector, limit=2)) == 1
+
+
+def _id_selector(element_id: str) -> str:
+    return f"#{element_id}" if SIMPLE_ID_RE.fullmatch(element_id) else f"[id={_quote(element_id)}]"
+
+
+def _selector_for(soup: BeautifulSoup, el: Tag, scope_selector: str) -> str:
+    if el.get("id") and _is_unique(soup, _id_selector(el["id"])):
+        return _id_selector(el["id"])
+    name = el.get("name")
+    if name:
+        by_name = f"{el.name}[name={_quote(name)}]"
+        if _is_unique(soup, by_name):
+            return by_name
+        if scope_selector and _is_unique(soup, f"{scope_selector} {by_name}"):
+            return f"{scope_selector} {by_name}"
+
+    parts: List[str] = []
+    node = el
+    while isinstance(node, Tag) and node.name not in ("body", "html", "[document]"):
+        if node is not el and node.get("id") and _is_unique(soup, _id_selector(node["id"])):
+            parts.insert(0, _id_selector(node["id"]))
+            return " > ".join(parts)
+        siblings = node.parent.find_all(node.name, recursive=False)
+        parts.insert(0, f"{node.name}:nth-of-type({siblings.index(node) + 1})" if len(siblings) > 1 else node.name)
+        node = node.parent
+    return " > ".join(["body"] + parts)
+
+
+def _label_for(soup: BeautifulSoup, el: Tag) -> str:
+    label = None
+    if el.get("id"):
+        label = soup.find("label", attrs={"for": el["id"]})
+    if label is None:
+        label = el.find_parent("label")
+    if label is not None:
+        # Text of the label without the control's own text (e.g. select options)
+        text = _clean(" ".join(
+            string for string in label.find_all(string=True)
+            if string.find_parent(["select", "textarea"]) is None
+        ))
+        if text:
+            return text
+    if el.get("aria-label"):
+        return _clean(el["aria-label"])
+    if el.get("aria-labelledby"):
+        return _clean(" ".join(_text(soup.find(id=element_id)) for element_id in el["aria-labelledby"].split()))
+    return ""
+
+
+def _is_required(el: Tag) -> bool:
+    return el.has_attr("required") or el.get("aria-required") == "true"
+
+
+def _fields_of(soup: BeautifulSoup, controls: List[Tag], scope_selector: str) -> List[Dict[str, Any]]:
+    fields: List[Dict[str, Any]] = []
+    radio_groups: Dict[str, Dict[str, Any]] = {}
+    for el in controls:
+        field_type = (el.get("type") or "text").lower() if el.name == "input" else el.name
+        if field_type in SKIP_TYPES or el.has_attr("disabled"):
+            continue
+
+        label = _label_for(soup, el)
+        name = el.get("name") or el.get("id") or re.sub(r"[^a-z0-9]+", "_", label.lower()) or field_type
+        if field_type == "radio":
+            group = radio_groups.get(name)
+            if group is None:
+                selector = f"input[name={_quote(name)}]"
+                if scope_selector and not _is_unique(soup, selector):
+                    selector = f"{scope_selector} {selector}"
+                group = radio_groups[name] = {
+                    "name": name, "type": field_type, "selector": selector, "required": False,
+                    "placeholder": "", "label": "", "pattern": "", "options": [],
+                }
+                fields.append(group)
+            group["required"] = group["required"] or _is_required(el)
+            group["options"].append(label or el.get("value", "on"))
+            continue
+
+        options = None
+        if el.name == "select":
+            options = [
+                _text(option) or option.get("value")
+                for option in el.find_all("option")
+                if option.get("value", _text(option)) != ""
+            ]
+        fields.append({
+            "name": name,
+            "type": field_type,
+            "selector": _selector_for(soup, el, scope_selector),
+            "required": _is_required(el),
+            "placeholder": el.get("placeholder", ""),
+            "label": label,
+            "pattern": el.get("pattern", ""),
+            "options": options,
+        })
+    return fields
+
+
+def _submit_of(soup: BeautifulSoup, container: Tag, scope_selector: str) -> Tuple[str, str]:
+    button = container.select_one('button[type="submit"], input[type="submit"], button:not([type])')
+    if button is None:
+        button = next(
+            (b for b in container.select('button, [role="button"]') if SIGNUP_RE.search(_text(b))), None
+        )
+    if button is None:
+        return "", ""
+    return _selector_for(soup, button, scope_selector), _text(button) or button.get("value", "")
+
+
+def _score(container: Tag, fields: List[Dict[str, Any]], submit_text: str) -> int:
+    passwords = sum(1 for field in fields if field["type"] == "password")
+    section = container.find_parent(["section", "article", "main", "div"]) or container
+    context = " ".join([
+        container.get("id", ""), " ".join(container.get("class", [])), container.get("action", ""),
+        submit_text, _text(section)[:500],
+    ])
+    value = min(len(fields), 5) + min(passwords, 2) * 3
+    if any(field["type"] == "email" or re.search(r"e-?mail", field["name"], re.I) for field in fields):
+        value += 2
+    if SIGNUP_RE.search(submit_text) or SIGNUP_RE.search(context):
+        value += 3
+    if LOGIN_RE.search(submit_text) and not SIGNUP_RE.search(submit_text):
+        value -= 4
+    return value
+
+
+def _describe(soup: BeautifulSoup, container: Tag, controls: List[Tag], selector: str,
+              action: str, method: str) -> Dict[str, Any]:
+    fields = _fields_of(soup, controls, selector)
+    submit_selector, submit_text = _submit_of(soup, container, selector)
+    return {
+        "selector": selector,
+        "action": action,
+        "method": method,
+        "fields": fields,
+        "submit_selector": submit_selector,
+        "has_terms_checkbox": any(
+            field["type"] == "checkbox" and TERMS_RE.search(f"{field['label']} {field['name']}") for field in fields
+        ),
+        "score": _score(container, fields, submit_text),
+    }
+
+
+def looks_script_rendered(soup: BeautifulSoup) -> bool:
+    """Whether the page seems to build its content with JavaScript."""
+    for root in soup.select(APP_ROOT_SELECTOR):
+        if not _text(root) and not root.find(["input", "form"]):
+            return True
+    noscript = soup.find("noscript")
+    return noscript is not None and "javascript" in _text(noscript).lower()
+
+
+def extract_forms_static(html: str, base_url: str) -> Dict[str, Any]:
+    """
+    Extract forms from static HTML in the same shape as EXTRACT_FORMS_SCRIPT.
+
+    Adds a ``script_rendered`` flag used to decide whether to escalate.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    script_rendered = looks_script_rendered(soup)
+    body = soup.body or soup
+    control_names = ["input", "select", "textarea"]
+
+    forms = []
+    for form in body.find_all("form"):
+        selector = _selector_for(soup, form, "")
+        # Like form.action in the DOM, a missing action means the page URL
+        entry = _describe(
+            soup, form, form.find_all(control_names), selector,
+            urljoin(base_url, form.get("action") or ""), (form.get("method") or "get").lower(),
+        )
+        if entry["fields"]:
+            forms.append(entry)
+
+    # Many single-page apps render inputs without a <form>
+    loose = [el for el in body.find_all(control_names) if el.find_parent("form") is None]
+    if loose:
+        entry = _describe(soup, body, loose, "", "", "post")
+        entry["selector"] = "body"
+        if entry["fields"]:
+            forms.append(entry)
+
+    has_captcha = soup.select_one(CAPTCHA_SELECTOR) is not None
+    # Visible text only, as innerText would report it
+    for hidden in soup(["script", "style", "template", "noscript"]):
+        hidden.decompose()
+    return {
+        "forms": forms,
+        "has_captcha": has_captcha,
+        "requires_email_verification": bool(VERIFY_RE.search(_text(soup.body or soup))),
+        "script_rendered": script_rendered,
+    }
+
+
+def escalation_reason(extraction: Dict[str, Any]) -> Optional[str]:
+    """Why a static extraction needs the browser, or None if it can be used as is."""
+    form = best_form(extraction)
+    if form is None:
+        return "no_form"
+    if extraction.get("script_rendered") and not any(
+        field["type"] in ("email", "password") for field in form["fields"]
+    ):
+        return "script_rendered"
+    return None
+
+
+class TieredAnalyzer:
+    """Analyze signup pages from static HTML, escalating to the browser pool when needed."""
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        browser_analyzer=analyze_website_signup,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_bytes: int = 2 * 1024 * 1024,
+        static_enabled: bool = True,
+    ):
+        """
+        Initialize the analyzer.
+
+        Args:
+            transport: httpx transport for the static tier (defaults to the network)
+            browser_analyzer: Coroutine analyzing a URL in a browser
+            timeout: Static fetch timeout in seconds
+            max_connections: Connection pool size of the static tier
+            max_bytes: Pages larger than this are cut off
+            static_enabled: Set False to always use the browser
+        """
+        self.transport = transport
+        self.browser_analyzer = browser_analyzer
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_bytes = max_bytes
+        self.static_enabled = static_enabled
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self.tiers: Counter = Counter()
+        self.escalations: Counter = Counter()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections, max_keepalive_connections=self.max_connections
+                ),
+                headers={
+                    "User-Agent": "Mozilla/5.0 (compatible; SignMeUp/1.0)",
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5",
+                },
+            )
+        return self._client
+
+    async def _fetch(self, url: str) -> Tuple[Optional[str], str, Optional[str]]:
+        """
+        Fetch a page.
+
+        Returns:
+            The HTML, the final URL after redirects (relative form actions
+            resolve against it) and None, or None, the URL and the escalation reason
+        """
+        try:
+            async with self._get_client().stream("GET", url) as response:
+                final_url = str(response.url)
+                if response.status_code >= 400:
+                    return None, final_url, f"http_{response.status_code}"
+                content_type = response.headers.get("content-type", "")
+                if "html" not in content_type:
+                    return None, final_url, "not_html"
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        break
+                html = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+                return html, final_url, None
+        except httpx.HTTPError as e:
+            logger.warning(f"Static fetch of {url} failed: {str(e)}")
+            return None, url, "fetch_error"
+
+    async def analyze(self, url: str) -> SignupFormAnalysis:
+        """Analyze a signup page with the cheapest tier that gives a usable result."""
+        reason = "static_disabled"
+        if self.static_enabled:
+            html, final_url, reason = await self._fetch(url)
+            if html is not None:
+                # Parsing is CPU-bound, keep it off the event loop
+                extraction = await asyncio.to_thread(extract_forms_static, html, final_url)
+                reason = escalation_reason(extraction)
+                if reason is None:
+                    analysis = analysis_from_extraction(extraction)
+                    analysis.tier = "static"
+                    self.tiers["static"] += 1
+                    log_automation_event("page_analysis_complete", {
+                        "url": url, "tier": "static", "fields": len(analysis.fields)
+                    })
+                    return analysis
+
+        self.escalations[reason] += 1
+        log_automation_event("page_analysis_escalated", {"url": url, "reason": reason})
+        analysis = await self.browser_analyzer(url)
+        analysis.tier = "browser"
+        self.tiers["browser"] += 1
+        return analysis
+
+    async def close(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many analyses each tier served and why pages escalated."""
+        return {
+            "static_enabled": self.static_enabled,
+            "tiers": dict(self.tiers),
+            "escalations": dict(self.escalations),
+        }
+
+
+_tiered_analyzer: Optional[TieredAnalyzer] = None
+
+
+def get_tiered_analyzer() -> TieredAnalyzer:
+    """Get the process-wide tiered analyzer."""
+    global _tiered_analyzer
+    if _tiered_analyzer is None:
+        _tiered_analyzer = TieredAnalyzer(
+            timeout=float(os.getenv("ANALYZER_HTTP_TIMEOUT", "10")),
+            max_connections=int(os.getenv("ANALYZER_HTTP_MAX_CONNECTIONS", "20")),
+            static_enabled=os.getenv("ANALYZER_STATIC_TIER", "true").lower() in ("1", "true", "yes", "on"),
+        )
+    return _tiered_analyzer
+
+
+async def close_tiered_analyzer():
+    """Close the tiered analyzer's HTTP client if it was created."""
+    if _tiered_analyzer is not None:
+        await _tiered_analyzer.close()
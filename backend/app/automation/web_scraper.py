@@ -1,11 +1,13 @@
-from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright, Browser, Page, Playwright, TimeoutError as PlaywrightTimeoutError
 from bs4 import BeautifulSoup
 import json
 import asyncio
+import os
 from typing import Dict, List, Optional, Any, Tuple
 from urllib.parse import urljoin, urlparse
 import re
 from dataclasses import dataclass
+from app.automation.browser_pool import get_browser_pool
 from app.utils.logging import get_logger, log_automation_event
 
 logger = get_logger(__name__)
@@ -36,22 +38,29 @@ class SignupFormAnalysis:
     has_terms_checkbox: bool = False
     requires_email_verification: bool = False
     additional_steps: List[str] = None
+    tier: str = ""  # Which analyzer produced this: "static" or "browser"
 
 
 class WebScraper:
-    """Web scraper for analyzing signup processes."""
+    """
+    Web scraper for analyzing signup processes.
     
-    def __init__(self, headless: bool = True, timeout: int = 30000):
+    Pass a ``page`` (e.g. from the browser pool) to analyze with it, or call
+    start()/close() to run a dedicated browser.
+    """
+    
+    def __init__(self, headless: bool = True, timeout: int = 30000, page: Optional[Page] = None):
         self.headless = headless
         self.timeout = timeout
+        self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
-        self.page: Optional[Page] = None
+        self.page: Optional[Page] = page
     
     async def start(self):
         """Start the browser instance."""
         try:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=self.headless)
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=self.headless)
             self.page = await self.browser.new_page()
             logger.info("Web scraper browser started")
         except Exception as e:
@@ -59,13 +68,18 @@ class WebScraper:
             raise
     
     async def close(self):
-        """Close the browser instance."""
+        """Close the browser instance and stop the Playwright driver."""
         try:
             if self.browser:
                 await self.browser.close()
+                self.browser = None
                 logger.info("Web scraper browser closed")
         except Exception as e:
             logger.error(f"Error closing browser: {str(e)}")
+        finally:
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
     
     async def analyze_signup_page(self, url: str) -> SignupFormAnalysis:
         """Analyze a signup page to understand its structure."""
@@ -78,19 +92,13 @@ class WebScraper:
             # Navigate to the page
             await self.page.goto(url, wait_until="networkidle", timeout=self.timeout)
             
-            # Basic form analysis (simplified for now)
-            form_analysis = SignupFormAnalysis(
-                form_selector="form",
-                action_url="/signup",
-                method="post",
-                fields=[
-                    FormField(name="email", type="email", selector="input[type='email']", required=True),
-                    FormField(name="password", type="password", selector="input[type='password']", required=True)
-                ],
-                submit_button_selector="button[type='submit']"
-            )
+            # Extract every form in one round trip and keep the signup one
+            from app.automation.form_extraction import EXTRACT_FORMS_SCRIPT, analysis_from_extraction
+            form_analysis = analysis_from_extraction(await self.page.evaluate(EXTRACT_FORMS_SCRIPT))
             
-            log_automation_event("page_analysis_complete", {"url": url})
+            log_automation_event("page_analysis_complete", {
+                "url": url, "fields": len(form_analysis.fields), "captcha": form_analysis.has_captcha
+            })
             return form_analysis
             
         except Exception as e:
@@ -100,10 +108,7 @@ class WebScraper:
 
 
 async def analyze_website_signup(url: str) -> SignupFormAnalysis:
-    """Analyze a website's signup process."""
-    scraper = WebScraper()
-    try:
-        await scraper.start()
+    """Analyze a website's signup process using a page from the browser pool."""
+    async with get_browser_pool().page() as page:
+        scraper = WebScraper(timeout=int(os.getenv("BROWSER_TIMEOUT", "30000")), page=page)
         return await scraper.analyze_signup_page(url)
-    finally:
-        await scraper.close() 
\ No newline at end of file
@@ -1,27 +1,166 @@
 """
 Database configuration and utilities for SignMeUp.
-Modified to use SQLite for local development.
+
+The engine is configured from the environment: DATABASE_URL_ASYNC (or
+DATABASE_URL, mapped onto its async driver) selects the database and falls
+back to a local SQLite file for development.
 """
 import asyncio
-from typing import AsyncGenerator
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 import os
 from pathlib import Path
 
-# Create database directory if it doesn't exist
-db_dir = Path("data")
-db_dir.mkdir(exist_ok=True)
+SQLITE_DATABASE_URL = "sqlite+aiosqlite:///./data/signmeup.db"
+
+# Sync drivers mapped onto the async driver used by the application
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_database_url() -> str:
+    """Resolve the async database URL from the environment."""
+    url = os.getenv("DATABASE_URL_ASYNC") or os.getenv("DATABASE_URL") or SQLITE_DATABASE_URL
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+# Pragma profiles applied to every new SQLite connection. "performance" uses
+# WAL so readers are not blocked by a writer, waits on locks instead of
+# failing with "database is locked", and keeps more of the database in memory.
+SQLITE_PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def get_sqlite_pragmas(profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resolve the SQLite pragmas for a profile, with SQLITE_<PRAGMA> overrides.
+
+    Args:
+        profile: Profile name (defaults to SQLITE_PRAGMA_PROFILE, "performance")
+
+    Returns:
+        Pragma names mapped to values
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    profile = profile or os.getenv("SQLITE_PRAGMA_PROFILE", "performance")
+    if profile not in SQLITE_PRAGMA_PROFILES:
+        valid = ", ".join(f'"{name}"' for name in SQLITE_PRAGMA_PROFILES)
+        raise ValueError(f'Unknown SQLITE_PRAGMA_PROFILE "{profile}"; expected one of {valid}')
+    pragmas = dict(SQLITE_PRAGMA_PROFILES[profile])
+    for name in SQLITE_PRAGMA_PROFILES["performance"]:
+        value = os.getenv(f"SQLITE_{name.upper()}")
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+def create_engine_from_env(url: str, sqlite_profile: Optional[str] = None):
+    """
+    Create the async engine for a database URL using the DATABASE_* settings.
+
+    Args:
+        url: Async database URL
+        sqlite_profile: SQLite pragma profile (defaults to SQLITE_PRAGMA_PROFILE)
+
+    Returns:
+        Configured AsyncEngine
+    """
+    parsed_url = make_url(url)
+    backend = parsed_url.get_backend_name()
+    connect_args: Dict[str, Any] = {}
+    pool_args: Dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_flag("DATABASE_POOL_PRE_PING", "true"),
+    }
+
+    if backend == "sqlite":
+        if parsed_url.database in (None, "", ":memory:"):
+            # Every connection to :memory: opens its own empty database, so share one
+            pool_args = {"poolclass": StaticPool}
+        else:
+            # Create database directory if it doesn't exist
+            Path(parsed_url.database).parent.mkdir(parents=True, exist_ok=True)
+        connect_args["check_same_thread"] = False
+    elif parsed_url.get_driver_name() == "asyncpg":
+        # Set DATABASE_STATEMENT_CACHE_SIZE=0 behind PgBouncer in transaction mode
+        connect_args["statement_cache_size"] = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100"))
 
-# SQLite database URL for local development
-DATABASE_URL = f"sqlite+aiosqlite:///./data/signmeup.db"
+    async_engine = create_async_engine(
+        url,
+        echo=_env_flag("DATABASE_ECHO"),
+        connect_args=connect_args,
+        **pool_args,
+    )
+
+    if backend == "sqlite":
+        pragmas = get_sqlite_pragmas(sqlite_profile)
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return async_engine
+
+
+DATABASE_URL = get_database_url()
 
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,  # Set to False in production
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_engine_from_env(DATABASE_URL)
 
 # Create session maker
 async_session_maker = async_sessionmaker(
@@ -52,10 +191,28 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
 get_db = get_async_session
 
 
+def get_pool_stats() -> Dict[str, Any]:
+    """Return connection pool usage and checkout wait metrics."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"backend": engine.dialect.name, "pool": type(pool).__name__}
+    if isinstance(pool, InstrumentedQueuePool):
+        checkouts = pool.checkouts or 1
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checkouts": pool.checkouts,
+            "timeouts": pool.timeouts,
+            "avg_wait_ms": pool.total_wait / checkouts * 1000,
+            "max_wait_ms": pool.max_wait * 1000,
+        })
+    return stats
+
+
 async def create_tables():
     """Create all database tables."""
     try:
-        from app.models import User, Identity, Account, SignupScript, ApiKey
+        from app.models import User, Identity, Account, SignupScript, ApiKey, JobCheckpoint, RevokedToken, RefreshSession, MachineKey
         
         async with engine.begin() as conn:
             # Create all tables
@@ -0,0 +1 @@
+# Background jobs package
\ No newline at end of file
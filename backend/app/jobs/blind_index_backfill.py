@@ -0,0 +1,115 @@
+"""
+Backfill blind-index columns for a user's identities and accounts.
+
+Blind indexes are keyed with the owner's derived key, so the backfill runs
+as a background task after login. It walks the user's rows in id-ordered
+batches, committing each batch with its checkpoint, so rows that were
+already processed are not decrypted again on later logins.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.jobs.checkpoints import advance_checkpoint, complete_checkpoint, load_checkpoint
+from app.models.account import Account
+from app.models.identity import Identity
+from app.utils.encryption import EncryptionManager
+from app.utils.identity_record import read_identity_fields
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+JOB_NAME = "blind_index_backfill"
+DEFAULT_BATCH_SIZE = 200
+
+
+async def backfill_identities(
+    session: AsyncSession,
+    user_id: int,
+    manager: EncryptionManager,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+) -> int:
+    """Compute email/phone blind indexes for a user's identities."""
+    checkpoint = await load_checkpoint(session, JOB_NAME, f"user:{user_id}:identities", restart=restart)
+    last_id = checkpoint.last_id
+    updated = 0
+
+    while True:
+        result = await session.execute(
+            select(Identity)
+            .where((Identity.user_id == user_id) & (Identity.id > last_id))
+            .order_by(Identity.id)
+            .limit(batch_size)
+        )
+        batch = result.scalars().all()
+        if not batch:
+            break
+
+        for identity in batch:
+            fields = await read_identity_fields(identity, manager)
+            identity.email_bidx = manager.blind_index(fields["email"], "email")
+            identity.phone_bidx = manager.blind_index(fields["phone"], "phone")
+            updated += 1
+
+        last_id = batch[-1].id
+        advance_checkpoint(checkpoint, last_id)
+        await session.commit()
+
+    complete_checkpoint(checkpoint)
+    await session.commit()
+    return updated
+
+
+async def backfill_accounts(
+    session: AsyncSession,
+    user_id: int,
+    manager: EncryptionManager,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+) -> int:
+    """Compute email/username blind indexes for a user's accounts."""
+    checkpoint = await load_checkpoint(session, JOB_NAME, f"user:{user_id}:accounts", restart=restart)
+    last_id = checkpoint.last_id
+    updated = 0
+
+    while True:
+        result = await session.execute(
+            select(Account)
+            .join(Identity, Account.identity_id == Identity.id)
+            .where((Identity.user_id == user_id) & (Account.id > last_id))
+            .order_by(Account.id)
+            .limit(batch_size)
+        )
+        batch = result.scalars().all()
+        if not batch:
+            break
+
+        values = await manager.decrypt_many(
+            [value for account in batch for value in (account.encrypted_email, account.encrypted_username)]
+        )
+        for index, account in enumerate(batch):
+            account.email_bidx = manager.blind_index(values[index * 2], "email")
+            account.username_bidx = manager.blind_index(values[index * 2 + 1], "username")
+            updated += 1
+
+        last_id = batch[-1].id
+        advance_checkpoint(checkpoint, last_id)
+        await session.commit()
+
+    complete_checkpoint(checkpoint)
+    await session.commit()
+    return updated
+
+
+async def backfill_blind_indexes_for_user(user_id: int, manager: EncryptionManager):
+    """Background task entry point: backfill a user's blind indexes with a fresh session."""
+    try:
+        async with async_session_maker() as session:
+            identities = await backfill_identities(session, user_id, manager)
+            accounts = await backfill_accounts(session, user_id, manager)
+        if identities or accounts:
+            logger.info(f"Backfilled blind indexes for user {user_id}: "
+                        f"{identities} identities, {accounts} accounts")
+    except Exception as e:
+        logger.error(f"Error backfilling blind indexes for user {user_id}: {str(e)}")
@@ -0,0 +1,64 @@
+"""
+Checkpoint helpers for resumable background jobs.
+
+Jobs walk rows in id order and record the last processed id (plus running
+totals) after every committed batch, so a crashed or interrupted run picks
+up where it left off instead of starting over.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.job_checkpoint import JobCheckpoint
+
+
+async def load_checkpoint(
+    session: AsyncSession,
+    job_name: str,
+    scope: str,
+    restart: bool = False,
+) -> JobCheckpoint:
+    """
+    Load (or create) the checkpoint for a job and scope.
+
+    Args:
+        session: Database session
+        job_name: Name of the job
+        scope: What the job is processing, e.g. a table name or "user:<id>"
+        restart: Discard any saved progress and start from the beginning
+
+    Returns:
+        The checkpoint row, attached to the session
+    """
+    result = await session.execute(
+        select(JobCheckpoint).where(
+            (JobCheckpoint.job_name == job_name) & (JobCheckpoint.scope == scope)
+        )
+    )
+    checkpoint = result.scalar_one_or_none()
+
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(job_name=job_name, scope=scope, last_id=0, state={})
+        session.add(checkpoint)
+        await session.flush()
+    elif restart:
+        checkpoint.last_id = 0
+        checkpoint.state = {}
+        checkpoint.completed_at = None
+
+    return checkpoint
+
+
+def advance_checkpoint(checkpoint: JobCheckpoint, last_id: int, state: Optional[Dict[str, Any]] = None):
+    """Record progress; the caller commits it together with the batch it covers."""
+    checkpoint.last_id = last_id
+    if state is not None:
+        # Assign a new dict so the JSON column is flagged as modified
+        checkpoint.state = dict(state)
+
+
+def complete_checkpoint(checkpoint: JobCheckpoint):
+    """Mark a job scope as finished."""
+    checkpoint.completed_at = datetime.now(timezone.utc)
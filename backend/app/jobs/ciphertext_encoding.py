@@ -0,0 +1,141 @@
+"""
+Rewrite legacy double base64 encoded ciphertexts as single-encoded tokens.
+
+Unwrapping the outer base64 layer does not need any user's key, so this job
+can run for all users at once. It walks identities, accounts and api_keys in
+id-ordered batches, commits each batch together with its checkpoint, and can
+be interrupted and resumed at any time.
+
+Usage:
+    python -m app.jobs.ciphertext_encoding [--batch-size 500] [--restart]
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.jobs.checkpoints import advance_checkpoint, complete_checkpoint, load_checkpoint
+from app.models import Account, ApiKey, Identity
+from app.utils.encryption import strip_legacy_encoding
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+JOB_NAME = "ciphertext_encoding"
+DEFAULT_BATCH_SIZE = 500
+MODELS = (Identity, Account, ApiKey)
+
+
+async def migrate_table(
+    session: AsyncSession,
+    model,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """
+    Re-encode the encrypted columns of one table.
+
+    Args:
+        session: Database session
+        model: Model whose ``encrypted_<field>`` columns are rewritten
+        batch_size: Rows processed per transaction
+        restart: Ignore saved progress and rescan the whole table
+
+    Returns:
+        Running totals for the table (rows scanned, values rewritten, bytes)
+    """
+    table = model.__tablename__
+    columns = [f"encrypted_{field}" for field in model.ENCRYPTED_FIELDS]
+    checkpoint = await load_checkpoint(session, JOB_NAME, table, restart=restart)
+    stats = {"rows_scanned": 0, "values_rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    stats.update(checkpoint.state or {})
+    last_id = checkpoint.last_id
+    await session.commit()
+
+    update_stmt = (
+        update(model.__table__)
+        .where(model.__table__.c.id == bindparam("row_id"))
+        .values({column: bindparam(column) for column in columns})
+    )
+
+    while True:
+        result = await session.execute(
+            select(model.id, *(getattr(model, column) for column in columns))
+            .where(model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            break
+
+        changed: List[Dict[str, Any]] = []
+        for row in rows:
+            values = dict(zip(columns, row[1:]))
+            rewritten = False
+            for column, value in values.items():
+                if not value:
+                    continue
+                new_value = strip_legacy_encoding(value)
+                if new_value != value:
+                    stats["values_rewritten"] += 1
+                    stats["bytes_before"] += len(value)
+                    stats["bytes_after"] += len(new_value)
+                    values[column] = new_value
+                    rewritten = True
+            if rewritten:
+                changed.append({"row_id": row[0], **values})
+
+        if changed:
+            await session.execute(update_stmt, changed)
+
+        last_id = rows[-1][0]
+        stats["rows_scanned"] += len(rows)
+        advance_checkpoint(checkpoint, last_id, stats)
+        await session.commit()
+
+    complete_checkpoint(checkpoint)
+    await session.commit()
+    return stats
+
+
+async def migrate_ciphertext_encoding(
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """Run the migration over every table holding encrypted columns."""
+    report = {}
+    async with async_session_maker() as session:
+        for model in MODELS:
+            report[model.__tablename__] = await migrate_table(session, model, batch_size, restart)
+            logger.info(f"Re-encoded ciphertexts in {model.__tablename__}", **report[model.__tablename__])
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, Any]]) -> str:
+    """Render the bytes-saved report as a table."""
+    lines = [f"{'table':<12} {'rows':>8} {'values':>8} {'before':>12} {'after':>12} {'saved':>12}"]
+    totals = {"rows_scanned": 0, "values_rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    for table, stats in list(report.items()) + [("total", totals)]:
+        if table != "total":
+            for key in totals:
+                totals[key] += stats[key]
+        saved = stats["bytes_before"] - stats["bytes_after"]
+        lines.append(
+            f"{table:<12} {stats['rows_scanned']:>8} {stats['values_rewritten']:>8} "
+            f"{stats['bytes_before']:>12} {stats['bytes_after']:>12} {saved:>12}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite legacy double-encoded ciphertexts")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress")
+    args = parser.parse_args()
+
+    print(format_report(asyncio.run(migrate_ciphertext_encoding(args.batch_size, args.restart))))
@@ -0,0 +1,81 @@
+"""
+Convert a user's identities to the compact single-envelope record layout.
+
+Conversion needs the owner's derived key, so it runs as a background task
+after login (when IDENTITY_RECORD_MODE=compact) and walks the user's
+remaining per-field rows in id-ordered batches, committing each batch.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.models.identity import Identity
+from app.utils.encryption import EncryptionManager
+from app.utils.identity_record import IdentityRecordError, write_identity_fields
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+
+
+async def compact_identities(
+    session: AsyncSession,
+    user_id: int,
+    manager: EncryptionManager,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Convert a user's per-field identities into compact records.
+
+    Args:
+        session: Database session
+        user_id: Owner of the identities
+        manager: Encryption manager holding the owner's key
+        batch_size: Rows converted per transaction
+
+    Returns:
+        Number of identities converted
+    """
+    converted = 0
+    last_id = 0
+
+    while True:
+        result = await session.execute(
+            select(Identity)
+            .where(
+                (Identity.user_id == user_id)
+                & (Identity.id > last_id)
+                & Identity.encrypted_record.is_(None)
+            )
+            .order_by(Identity.id)
+            .limit(batch_size)
+        )
+        batch = result.scalars().all()
+        if not batch:
+            break
+
+        for identity in batch:
+            try:
+                await write_identity_fields(identity, manager, {}, compact=True)
+            except IdentityRecordError:
+                # Never overwrite columns we could not decrypt with this key
+                logger.warning(f"Skipping identity {identity.id}: could not decrypt all fields")
+                continue
+            converted += 1
+
+        await session.commit()
+        last_id = batch[-1].id
+
+    return converted
+
+
+async def compact_identities_for_user(user_id: int, manager: EncryptionManager):
+    """Background task entry point: convert a user's identities with a fresh session."""
+    try:
+        async with async_session_maker() as session:
+            converted = await compact_identities(session, user_id, manager)
+        if converted:
+            logger.info(f"Converted {converted} identities to compact records for user {user_id}")
+    except Exception as e:
+        logger.error(f"Error converting identities for user {user_id}: {str(e)}")
@@ -0,0 +1,326 @@
+"""
+Re-encrypt a user's data under a new master key or MASTER_KEY_SALT.
+
+The job walks the user's identities, accounts and API keys in id-ordered
+batches. Each batch is read, decrypted and re-encrypted on the crypto worker
+pool before anything is written, then updated and committed together with
+its checkpoint, so write locks are only held for the short UPDATE of one
+batch and an interrupted rotation resumes from the last committed batch.
+
+Rows are read with a manager that tries the old key first and falls back to
+the new one, so rows that are already rotated (or were written through the
+API while the rotation was running) are handled too. The user's stored
+master key hash is only replaced once every row has been rotated, and the
+user's machine keys (which wrap the old data key) are revoked at the same time.
+Until then, logging in requires both keys so the rotation can be resumed
+(see pending_rotation_hash).
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.jobs.checkpoints import advance_checkpoint, complete_checkpoint, load_checkpoint
+from app.models import Account, ApiKey, Identity, JobCheckpoint, MachineKey, User
+from app.utils.encryption import (
+    EncryptionManager, generate_master_key_hash_async, get_crypto_executor,
+    get_keyring, verify_master_key_async
+)
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+JOB_NAME = "key_rotation"
+DEFAULT_BATCH_SIZE = 200
+
+# Users with a rotation running in this process
+_running: Set[int] = set()
+
+
+class KeyRotationError(Exception):
+    """Raised when a rotation cannot be started or a row cannot be decrypted."""
+
+
+def is_rotation_running(user_id: int) -> bool:
+    """Whether a key rotation is currently running for the user."""
+    return user_id in _running
+
+
+async def pending_rotation_hash(session: AsyncSession, user_id: int) -> Optional[str]:
+    """
+    Return the target master key hash of an unfinished rotation, or None.
+
+    While a rotation is unfinished some of the user's rows are encrypted with
+    the new key, so the old key alone can no longer read all of their data.
+    """
+    result = await session.execute(
+        select(JobCheckpoint).where(
+            (JobCheckpoint.job_name == JOB_NAME) & (JobCheckpoint.scope == f"user:{user_id}")
+        )
+    )
+    checkpoint = result.scalar_one_or_none()
+    if checkpoint is None or checkpoint.completed_at is not None:
+        return None
+    return (checkpoint.state or {}).get("pending_master_key_hash")
+
+
+async def begin_rotation(
+    session: AsyncSession,
+    user_id: int,
+    new_master_key: str,
+    salt: Optional[str] = None,
+) -> bool:
+    """
+    Record a pending rotation to a new master key, or resume a pending one.
+
+    Args:
+        session: Database session (the caller commits)
+        user_id: Owner of the data being rotated
+        new_master_key: Master key the data is rotated to
+        salt: MASTER_KEY_SALT the new key is used with (defaults to the env value)
+
+    Returns:
+        True if a new rotation was started, False if an interrupted one resumes
+
+    Raises:
+        KeyRotationError: If a rotation to a different master key is unfinished
+    """
+    pending_hash = await pending_rotation_hash(session, user_id)
+    if pending_hash:
+        if not await verify_master_key_async(new_master_key, pending_hash, salt):
+            raise KeyRotationError("A rotation to a different master key is still in progress")
+        return False
+
+    new_hash = await generate_master_key_hash_async(new_master_key, salt)
+    checkpoint = await load_checkpoint(session, JOB_NAME, f"user:{user_id}", restart=True)
+    advance_checkpoint(checkpoint, 0, {"pending_master_key_hash": new_hash})
+    return True
+
+
+def _decrypt_records(blobs: Sequence[Optional[bytes]], reader: EncryptionManager) -> List[Optional[Dict[str, Any]]]:
+    """Decrypt compact identity records; runs on the crypto worker pool."""
+    return [reader.decrypt_record(blob) if blob else None for blob in blobs]
+
+
+async def _reencrypt(values: Sequence[Optional[str]], reader: EncryptionManager,
+                     writer: EncryptionManager) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+    """
+    Decrypt values with the reader and encrypt them with the writer.
+
+    Returns:
+        Plaintexts and new ciphertexts, both in the order of ``values``
+    """
+    plaintexts = await reader.decrypt_many(values)
+    for value, plaintext in zip(values, plaintexts):
+        if value and plaintext is None:
+            raise KeyRotationError("Found a value that neither the old nor the new key can decrypt")
+    return plaintexts, await writer.encrypt_many(plaintexts)
+
+
+async def _rotate_identities(session: AsyncSession, user_id: int, reader: EncryptionManager,
+                             writer: EncryptionManager, batch_size: int, restart: bool) -> int:
+    checkpoint = await load_checkpoint(session, JOB_NAME, f"user:{user_id}:identities", restart=restart)
+    last_id = checkpoint.last_id
+    fields = Identity.ENCRYPTED_FIELDS
+    rotated = 0
+
+    while True:
+        result = await session.execute(
+            select(Identity)
+            .where((Identity.user_id == user_id) & (Identity.id > last_id))
+            .order_by(Identity.id)
+            .limit(batch_size)
+        )
+        batch = result.scalars().all()
+        if not batch:
+            break
+
+        plaintexts, ciphertexts = await _reencrypt(
+            [getattr(identity, f"encrypted_{field}") for identity in batch for field in fields],
+            reader, writer
+        )
+        loop = asyncio.get_running_loop()
+        records = await loop.run_in_executor(
+            get_crypto_executor(), _decrypt_records,
+            [identity.encrypted_record for identity in batch], reader
+        )
+
+        for index, identity in enumerate(batch):
+            offset = index * len(fields)
+            values = dict(zip(fields, plaintexts[offset:offset + len(fields)]))
+            for position, field in enumerate(fields):
+                setattr(identity, f"encrypted_{field}", ciphertexts[offset + position])
+
+            if identity.encrypted_record:
+                if records[index] is None:
+                    raise KeyRotationError(f"Identity {identity.id} record cannot be decrypted")
+                values = records[index]
+                identity.encrypted_record = writer.encrypt_record(records[index])
+
+            identity.email_bidx = writer.blind_index(values.get("email"), "email")
+            identity.phone_bidx = writer.blind_index(values.get("phone"), "phone")
+            rotated += 1
+
+        last_id = batch[-1].id
+        advance_checkpoint(checkpoint, last_id)
+        await session.commit()
+
+    complete_checkpoint(checkpoint)
+    await session.commit()
+    return rotated
+
+
+async def _rotate_accounts(session: AsyncSession, user_id: int, reader: EncryptionManager,
+                           writer: EncryptionManager, batch_size: int, restart: bool) -> int:
+    checkpoint = await load_checkpoint(session, JOB_NAME, f"user:{user_id}:accounts", restart=restart)
+    last_id = checkpoint.last_id
+    fields = Account.ENCRYPTED_FIELDS
+    rotated = 0
+
+    while True:
+        result = await session.execute(
+            select(Account)
+            .join(Identity, Account.identity_id == Identity.id)
+            .where((Identity.user_id == user_id) & (Account.id > last_id))
+            .order_by(Account.id)
+            .limit(batch_size)
+        )
+        batch = result.scalars().all()
+        if not batch:
+            break
+
+        plaintexts, ciphertexts = await _reencrypt(
+            [getattr(account, f"encrypted_{field}") for account in batch for field in fields],
+            reader, writer
+        )
+        for index, account in enumerate(batch):
+            offset = index * len(fields)
+            values = dict(zip(fields, plaintexts[offset:offset + len(fields)]))
+            for position, field in enumerate(fields):
+                setattr(account, f"encrypted_{field}", ciphertexts[offset + position])
+            account.email_bidx = writer.blind_index(values["email"], "email")
+            account.username_bidx = writer.blind_index(values["username"], "username")
+            rotated += 1
+
+        last_id = batch[-1].id
+        advance_checkpoint(checkpoint, last_id)
+        await session.commit()
+
+    complete_checkpoint(checkpoint)
+    await session.commit()
+    return rotated
+
+
+async def _rotate_api_keys(session: AsyncSession, user_id: int, reader: EncryptionManager,
+                           writer: EncryptionManager, batch_size: int, restart: bool) -> int:
+    checkpoint = await load_checkpoint(session, JOB_NAME, f"user:{user_id}:api_keys", restart=restart)
+    last_id = checkpoint.last_id
+    fields = ApiKey.ENCRYPTED_FIELDS
+    rotated = 0
+
+    while True:
+        result = await session.execute(
+            select(ApiKey)
+            .join(Account, ApiKey.account_id == Account.id)
+            .join(Identity, Account.identity_id == Identity.id)
+            .where((Identity.user_id == user_id) & (ApiKey.id > last_id))
+            .order_by(ApiKey.id)
+            .limit(batch_size)
+        )
+        batch = result.scalars().all()
+        if not batch:
+            break
+
+        _, ciphertexts = await _reencrypt(
+            [getattr(api_key, f"encrypted_{field}") for api_key in batch for field in fields],
+            reader, writer
+        )
+        for index, api_key in enumerate(batch):
+            offset = index * len(fields)
+            for position, field in enumerate(fields):
+                setattr(api_key, f"encrypted_{field}", ciphertexts[offset + position])
+            rotated += 1
+
+        last_id = batch[-1].id
+        advance_checkpoint(checkpoint, last_id)
+        await session.commit()
+
+    complete_checkpoint(checkpoint)
+    await session.commit()
+    return rotated
+
+
+async def rotate_user_keys(
+    session: AsyncSession,
+    user_id: int,
+    old_manager: EncryptionManager,
+    new_manager: EncryptionManager,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+) -> Dict[str, int]:
+    """
+    Re-encrypt all of a user's encrypted rows from one key to another.
+
+    Args:
+        session: Database session
+        user_id: Owner of the rows
+        old_manager: Manager for the key the data is currently encrypted with
+        new_manager: Manager for the key the data is rotated to (a changed
+            master key, salt, or both)
+        batch_size: Rows re-encrypted per transaction
+        restart: Ignore saved progress and rotate every row again
+
+    Returns:
+        Number of rows rotated per table
+    """
+    reader = old_manager.with_fallback(new_manager)
+    return {
+        "identities": await _rotate_identities(session, user_id, reader, new_manager, batch_size, restart),
+        "accounts": await _rotate_accounts(session, user_id, reader, new_manager, batch_size, restart),
+        "api_keys": await _rotate_api_keys(session, user_id, reader, new_manager, batch_size, restart),
+    }
+
+
+async def rotate_keys_for_user(
+    user_id: int,
+    old_manager: EncryptionManager,
+    new_manager: EncryptionManager,
+    restart: bool = False,
+):
+    """
+    Background task entry point: rotate a user's data, then switch their key.
+
+    The pending master key hash recorded by begin_rotation becomes the
+    user's master key hash once all rows are rotated.
+    """
+    if user_id in _running:
+        return
+    _running.add(user_id)
+    try:
+        async with async_session_maker() as session:
+            counts = await rotate_user_keys(session, user_id, old_manager, new_manager, restart=restart)
+
+            checkpoint = await load_checkpoint(session, JOB_NAME, f"user:{user_id}")
+            user = await session.get(User, user_id)
+            pending_hash = (checkpoint.state or {}).get("pending_master_key_hash")
+            if user is not None and pending_hash:
+                user.master_key_hash = pending_hash
+            # Machine keys wrap the old data key and cannot be re-wrapped without their secrets
+            await session.execute(
+                update(MachineKey)
+                .where((MachineKey.user_id == user_id) & MachineKey.revoked_at.is_(None))
+                .values(is_active=False, revoked_at=datetime.utcnow())
+            )
+            complete_checkpoint(checkpoint)
+            await session.commit()
+
+        get_keyring().put(user_id, new_manager)
+        logger.info(f"Rotated encryption key for user {user_id}", **counts)
+    except Exception as e:
+        logger.error(f"Error rotating encryption key for user {user_id}: {str(e)}")
+    finally:
+        _running.discard(user_id)
@@ -1,18 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import os
 from dotenv import load_dotenv
 
-from app.routers import auth, identities, accounts, automation, chat
-from app.utils.logging import setup_logging
-
-# Load environment variables
+# Load environment variables before any module reads its settings
 load_dotenv()
 
+from app.automation.analysis_cache import get_analysis_cache
+from app.automation.browser_pool import close_browser_pool, get_browser_pool
+from app.automation.static_analyzer import close_tiered_analyzer, get_tiered_analyzer
+from app.database import engine, get_pool_stats
+from app.routers import auth, identities, accounts, automation, chat, machine_keys
+from app.utils.logging import setup_logging
+from app.utils.encryption import get_keyring
+from app.utils.cpu_pool import get_auth_pool
+from app.utils.machine_keys import get_usage_recorder
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.rate_limit import get_login_throttle
+from app.utils.revocation import get_revocation_list
+from app.utils.user_cache import get_user_cache
+
 # Setup logging
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop long-lived resources."""
+    # Derived encryption keys live in this process's keyring only
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        raise RuntimeError(
+            "SignMeUp keeps encryption keys in process memory and must run with a single "
+            "worker; unset WEB_CONCURRENCY or set it to 1"
+        )
+    # Build the login throttle now so invalid LOGIN_* limits fail at startup
+    get_login_throttle()
+    usage_flusher = asyncio.create_task(get_usage_recorder().run())
+    yield
+    usage_flusher.cancel()
+    await get_usage_recorder().flush()
+    await close_tiered_analyzer()
+    await close_browser_pool()
+    get_auth_pool().shutdown()
+    await engine.dispose()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="SignMeUp API",
@@ -20,6 +55,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -29,6 +65,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Listings return the next page's cursor in a response header
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Add trusted host middleware for security
@@ -43,6 +81,7 @@ app.include_router(identities.router, prefix="/api/v1/identities", tags=["Identi
 app.include_router(accounts.router, prefix="/api/v1/accounts", tags=["Accounts"])
 app.include_router(automation.router, prefix="/api/v1/automation", tags=["Automation"])
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["Chat"])
+app.include_router(machine_keys.router, prefix="/api/v1/machine-keys", tags=["Machine Keys"])
 
 
 @app.get("/")
@@ -60,7 +99,7 @@ async def health_check():
     """Detailed health check endpoint."""
     return {
         "status": "healthy",
-        "database": "connected (SQLite)",
+        "database": f"connected ({engine.dialect.name})",
         "services": {
             "automation": "available",
             "encryption": "enabled",
@@ -69,6 +108,23 @@ async def health_check():
     }
 
 
+@app.get("/health/metrics")
+async def metrics():
+    """Runtime cache and pool metrics."""
+    return {
+        "keyring": get_keyring().stats(),
+        "auth_pool": get_auth_pool().stats(),
+        "database_pool": get_pool_stats(),
+        "user_cache": get_user_cache().stats() if get_user_cache() else None,
+        "token_revocation": get_revocation_list().stats(),
+        "machine_key_usage": get_usage_recorder().stats(),
+        "browser_pool": get_browser_pool().stats(),
+        "analysis_cache": get_analysis_cache().stats(),
+        "page_analyzer": get_tiered_analyzer().stats(),
+        "login_throttle": get_login_throttle().stats() if get_login_throttle() else None,
+    }
+
+
 # Demo endpoints (kept for backward compatibility)
 @app.get("/api/v1/demo/identities")
 async def demo_identities():
@@ -7,11 +7,19 @@ from .identity import Identity
 from .account import Account
 from .signup_script import SignupScript
 from .api_key import ApiKey
+from .job_checkpoint import JobCheckpoint
+from .revoked_token import RevokedToken
+from .refresh_session import RefreshSession
+from .machine_key import MachineKey
 
 __all__ = [
     "User",
     "Identity", 
     "Account",
     "SignupScript",
-    "ApiKey"
+    "ApiKey",
+    "JobCheckpoint",
+    "RevokedToken",
+    "RefreshSession",
+    "MachineKey"
 ] 
\ No newline at end of file
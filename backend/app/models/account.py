@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -8,6 +8,15 @@ class Account(Base):
     """Account model for storing website accounts."""
     
     __tablename__ = "accounts"
+    # Accounts of an identity, optionally for one website, and keyset
+    # pagination on (created_at, id)
+    __table_args__ = (
+        Index("ix_accounts_identity_id_website_domain", "identity_id", "website_domain"),
+        Index("ix_accounts_identity_id_created_at_id", "identity_id", "created_at", "id"),
+    )
+    
+    # Fields stored encrypted as ``encrypted_<field>`` columns
+    ENCRYPTED_FIELDS = ("username", "email", "password", "security_questions", "notes")
     
     id = Column(Integer, primary_key=True, index=True)
     identity_id = Column(Integer, ForeignKey("identities.id"), nullable=False)
@@ -22,6 +31,10 @@ class Account(Base):
     encrypted_email = Column(Text)
     encrypted_password = Column(Text)
     
+    # Blind indexes (keyed HMAC) for equality search on encrypted fields
+    email_bidx = Column(String(64), index=True)
+    username_bidx = Column(String(64), index=True)
+    
     # Account status
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
@@ -36,7 +49,7 @@ class Account(Base):
     encrypted_notes = Column(Text)  # Additional notes
     
     # Automation information
-    signup_script_id = Column(Integer, ForeignKey("signup_scripts.id"))
+    signup_script_id = Column(Integer, ForeignKey("signup_scripts.id"), index=True)
     signup_attempts = Column(Integer, default=0)
     last_signup_attempt = Column(DateTime(timezone=True))
     
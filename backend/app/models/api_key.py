@@ -9,8 +9,11 @@ class ApiKey(Base):
     
     __tablename__ = "api_keys"
     
+    # Fields stored encrypted as ``encrypted_<field>`` columns
+    ENCRYPTED_FIELDS = ("key_value", "secret", "additional_data", "notes")
+    
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
     
     # API Key information
     key_name = Column(String(200), nullable=False)  # Name/description of the key
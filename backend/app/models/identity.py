@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, LargeBinary, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -8,6 +8,20 @@ class Identity(Base):
     """Identity model for storing digital identities."""
     
     __tablename__ = "identities"
+    # Per-user listings, ownership checks (user_id == ? AND id == ?) and
+    # keyset pagination on (created_at, id)
+    __table_args__ = (
+        Index("ix_identities_user_id_id", "user_id", "id"),
+        Index("ix_identities_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+    
+    # Personal fields stored encrypted as ``encrypted_<field>`` columns
+    # (or together in ``encrypted_record`` in compact record mode)
+    ENCRYPTED_FIELDS = (
+        "first_name", "last_name", "email", "phone", "date_of_birth",
+        "address_line1", "address_line2", "city", "state", "zip_code", "country",
+        "profession", "company", "bio", "custom_fields",
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -39,6 +53,13 @@ class Identity(Base):
     # Custom fields (encrypted JSON)
     encrypted_custom_fields = Column(Text)  # JSON string of custom fields
     
+    # Compact record mode: all encrypted fields in one versioned blob
+    encrypted_record = Column(LargeBinary)
+    
+    # Blind indexes (keyed HMAC) for equality search on encrypted fields
+    email_bidx = Column(String(64), index=True)
+    phone_bidx = Column(String(64), index=True)
+    
     # Preferences
     preferred_username_pattern = Column(String(100))  # Pattern for generating usernames
     password_preferences = Column(JSON)  # Password generation preferences
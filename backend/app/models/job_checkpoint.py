@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class JobCheckpoint(Base):
+    """JobCheckpoint model for resuming long-running background jobs."""
+    
+    __tablename__ = "job_checkpoints"
+    __table_args__ = (UniqueConstraint("job_name", "scope", name="uq_job_checkpoints_job_scope"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String(100), nullable=False)
+    scope = Column(String(200), nullable=False)  # e.g. table name or "user:<id>"
+    
+    # Progress (keyset position and running totals)
+    last_id = Column(Integer, default=0, nullable=False)
+    state = Column(JSON)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    
+    def __repr__(self):
+        return f"<JobCheckpoint(job='{self.job_name}', scope='{self.scope}', last_id={self.last_id})>"
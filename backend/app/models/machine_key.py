@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class MachineKey(Base):
+    """MachineKey model for API keys that authenticate scripts against SignMeUp itself."""
+    
+    __tablename__ = "machine_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String(200), nullable=False)
+    
+    # Key is "smu_<prefix>_<secret>"; the prefix is looked up, the secret verified
+    prefix = Column(String(16), unique=True, index=True, nullable=False)
+    secret_hash = Column(String(64), nullable=False)  # HMAC-SHA256 of the secret
+    
+    # The user's data key, wrapped with a key derived from the secret
+    wrapped_data_key = Column(Text, nullable=False)
+    
+    # Usage tracking (written in batches, see app.utils.machine_keys)
+    last_used = Column(DateTime(timezone=True))
+    usage_count = Column(Integer, default=0, nullable=False)
+    
+    # Status
+    is_active = Column(Boolean, default=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True))
+    revoked_at = Column(DateTime(timezone=True))
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<MachineKey(id={self.id}, name='{self.name}', prefix='{self.prefix}', user_id={self.user_id})>"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RefreshSession(Base):
+    """RefreshSession model for rotating refresh tokens issued at login."""
+    
+    __tablename__ = "refresh_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    
+    # SHA-256 of the refresh token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # Every token rotated from the same login shares a family
+    family_id = Column(String(32), nullable=False, index=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    rotated_at = Column(DateTime(timezone=True))  # set once exchanged for a new token
+    revoked_at = Column(DateTime(timezone=True))
+    
+    def __repr__(self):
+        return f"<RefreshSession(user_id={self.user_id}, family_id='{self.family_id}')>"
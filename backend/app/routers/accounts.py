@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel
@@ -6,10 +6,15 @@ from typing import List, Optional
 from datetime import datetime
 
 from app.database import get_db
-from app.models.user import User
+from app.utils.user_cache import UserSnapshot
 from app.models.account import Account
-from app.routers.auth import get_current_user
+from app.models.identity import Identity
+from app.routers.auth import get_current_user, get_encryption_manager
+from app.utils.encryption import EncryptionManager
 from app.utils.logging import get_logger
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, InvalidCursorError, paginate, split_page
+)
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -24,21 +29,46 @@ class AccountResponse(BaseModel):
     created_at: datetime
 
 
+def user_accounts_query(user_id: int):
+    """Select a user's accounts with a single join on identities.user_id."""
+    return (
+        select(Account)
+        .join(Identity, Account.identity_id == Identity.id)
+        .where(Identity.user_id == user_id)
+    )
+
+
 @router.get("/", response_model=List[AccountResponse])
 async def list_accounts(
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    website_domain: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    identity_id: Optional[int] = Query(None),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all accounts for the current user."""
+    """
+    List the current user's accounts, oldest first.
+    
+    Pass the X-Next-Cursor response header back as ``cursor`` for the next page.
+    """
     try:
-        # This is a simplified version - in the full implementation,
-        # you would decrypt account data and join with identities
+        query = user_accounts_query(current_user.id)
+        if website_domain:
+            query = query.where(Account.website_domain == website_domain.lower())
+        if is_active is not None:
+            query = query.where(Account.is_active == is_active)
+        if identity_id is not None:
+            query = query.where(Account.identity_id == identity_id)
+        
         result = await db.execute(
-            select(Account).join(Account.identity).where(
-                Account.identity.has(user_id=current_user.id)
-            )
+            paginate(query, Account, cursor, limit, db.get_bind().dialect.name)
         )
-        accounts = result.scalars().all()
+        accounts, next_cursor = split_page(result.scalars().all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
         return [
             AccountResponse(
@@ -52,9 +82,60 @@ async def list_accounts(
             for account in accounts
         ]
         
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error listing accounts: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving accounts"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.get("/search", response_model=List[AccountResponse])
+async def search_accounts(
+    email: Optional[str] = Query(None),
+    username: Optional[str] = Query(None),
+    current_user: UserSnapshot = Depends(get_current_user),
+    encryption: EncryptionManager = Depends(get_encryption_manager),
+    db: AsyncSession = Depends(get_db)
+):
+    """Find the current user's accounts by exact email and/or username."""
+    if not email and not username:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide an email or username to search for"
+        )
+    
+    try:
+        # Equality lookups go through the blind-index columns, never decryption
+        query = user_accounts_query(current_user.id)
+        if email:
+            query = query.where(Account.email_bidx == encryption.blind_index(email, "email"))
+        if username:
+            query = query.where(Account.username_bidx == encryption.blind_index(username, "username"))
+        
+        result = await db.execute(query)
+        accounts = result.scalars().all()
+        
+        return [
+            AccountResponse(
+                id=account.id,
+                website_name=account.website_name,
+                website_url=account.website_url,
+                is_active=account.is_active,
+                signup_completed=account.signup_completed,
+                created_at=account.created_at
+            )
+            for account in accounts
+        ]
+        
+    except Exception as e:
+        logger.error(f"Error searching accounts: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching accounts"
+        )
\ No newline at end of file
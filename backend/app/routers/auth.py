@@ -1,20 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import AsyncIterator, Optional
+import math
 import os
+import uuid
 from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr
 
 from app.database import get_db
 from app.models.user import User
+from app.models.identity import Identity
 from app.utils.encryption import (
-    hash_password, verify_password, generate_master_key_hash, 
-    verify_master_key, set_global_encryption_manager
+    hash_password_async, verify_password_async, generate_master_key_hash_async,
+    verify_master_key_async, get_keyring, set_current_encryption_manager,
+    reset_current_encryption_manager, create_encryption_manager_async, EncryptionManager
 )
+from app.utils.cpu_pool import PoolSaturatedError
+from app.jobs.key_rotation import (
+    KeyRotationError, begin_rotation, is_rotation_running, pending_rotation_hash, rotate_keys_for_user
+)
+from app.utils.identity_record import compact_record_mode
 from app.utils.logging import get_logger, log_security_event
+from app.utils.machine_keys import (
+    authenticate_machine_key, get_usage_recorder, is_machine_key, keyring_fingerprint, unwrap_data_key
+)
+from app.utils.rate_limit import get_login_throttle
+from app.utils.refresh_tokens import (
+    RefreshTokenError, issue_refresh_token, prune_refresh_sessions, revoke_refresh_family,
+    rotate_refresh_token
+)
+from app.utils.revocation import get_revocation_list
+from app.utils.user_cache import UserSnapshot, get_user_cache
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -23,7 +43,7 @@ security = HTTPBearer()
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
 
 
 # Pydantic models
@@ -40,11 +60,23 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
     master_key: str
+    # Only needed to resume an interrupted master key rotation
+    new_master_key: Optional[str] = None
+
+
+class MasterKeyRotation(BaseModel):
+    current_master_key: str
+    new_master_key: str
 
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class UserResponse(BaseModel):
@@ -65,31 +97,65 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti identifies the token so logout can revoke it
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+def _decode_token(credentials: HTTPAuthorizationCredentials) -> dict:
+    """Validate a bearer token's signature and expiry and return its claims."""
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise credentials_exception
-    except JWTError:
+        int(payload["sub"])
+        return payload
+    except (JWTError, ValueError):
         raise credentials_exception
+
+
+async def _user_id_from_machine_key(key: str, db: AsyncSession) -> int:
+    """Verify a machine key, count its use, and return its owner's id."""
+    authenticated = await authenticate_machine_key(db, key)
+    if authenticated is None:
+        raise credentials_exception
+    machine_key, secret = authenticated
+    get_usage_recorder().record(machine_key.id)
     
-    result = await db.execute(select(User).where(User.id == user_id))
+    # Requests made with the key can use encrypted fields without the master key
+    if get_keyring().get(machine_key.user_id) is None:
+        manager = unwrap_data_key(machine_key, secret)
+        if manager is not None:
+            get_keyring().put(machine_key.user_id, manager, keyring_fingerprint(machine_key.id))
+    return machine_key.user_id
+
+
+async def _user_id_from_token(credentials: HTTPAuthorizationCredentials, db: AsyncSession) -> int:
+    """Validate a bearer JWT or machine key, reject it if revoked, and return its user id."""
+    if is_machine_key(credentials.credentials):
+        return await _user_id_from_machine_key(credentials.credentials, db)
+    
+    payload = _decode_token(credentials)
+    # sid is revoked with its refresh session, jti by logging out with the token
+    for claim in ("jti", "sid"):
+        if payload.get(claim) and await get_revocation_list().is_revoked(db, payload[claim]):
+            raise credentials_exception
+    return int(payload["sub"])
+
+
+async def _load_authenticated_user(credentials: HTTPAuthorizationCredentials, db: AsyncSession, *options) -> User:
+    """Validate a bearer token and load its user with the given loader options."""
+    user_id = await _user_id_from_token(credentials, db)
+    
+    result = await db.execute(select(User).where(User.id == user_id).options(*options))
     user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
@@ -97,6 +163,75 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> UserSnapshot:
+    """
+    Get current authenticated user.
+    
+    Returns a read-only snapshot, served from the user cache when possible.
+    Load the User row when its hashes or relationships are needed.
+    """
+    user_id = await _user_id_from_token(credentials, db)
+    cache = get_user_cache()
+    if cache is not None:
+        snapshot = await cache.get(user_id)
+        if snapshot is not None:
+            return snapshot
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise credentials_exception
+    
+    snapshot = UserSnapshot.from_user(user)
+    if cache is not None:
+        await cache.set(snapshot)
+    return snapshot
+
+
+async def get_current_user_with_identities(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Get the current user with ``identities`` loaded up front.
+    
+    Identities are fetched in one extra SELECT with only their id and name,
+    so ``user.identities`` never lazy-loads inside an async request. Other
+    identity columns raise if accessed; load the Identity row for those.
+    """
+    return await _load_authenticated_user(
+        credentials, db,
+        selectinload(User.identities).load_only(Identity.id, Identity.name, raiseload=True)
+    )
+
+
+async def get_encryption_manager(
+    current_user: UserSnapshot = Depends(get_current_user)
+) -> AsyncIterator[EncryptionManager]:
+    """
+    Resolve the authenticated user's encryption manager from the keyring and
+    bind it to the current request so encrypt_field/decrypt_field use it.
+    
+    The keyring lives in this process only: run a single worker, or a
+    request served by another worker than the login gets a 401 here.
+    """
+    manager = get_keyring().get(current_user.id)
+    if manager is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Encryption key not available, please log in again",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = set_current_encryption_manager(manager)
+    try:
+        yield manager
+    finally:
+        reset_current_encryption_manager(token)
+
+
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
@@ -116,8 +251,8 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             )
         
         # Create new user
-        hashed_password = hash_password(user_data.password)
-        master_key_hash = generate_master_key_hash(user_data.master_key)
+        hashed_password = await hash_password_async(user_data.password)
+        master_key_hash = await generate_master_key_hash_async(user_data.master_key)
         
         new_user = User(
             username=user_data.username,
@@ -148,6 +283,13 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         
     except HTTPException:
         raise
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejected registration: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Error registering user: {str(e)}")
         raise HTTPException(
@@ -157,9 +299,25 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
+async def login(
+    user_data: UserLogin,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
     """Authenticate user and return access token."""
     try:
+        # Throttle before any database or bcrypt work
+        throttle = get_login_throttle()
+        if throttle is not None:
+            retry_after = await throttle.check(request.client.host if request.client else None, user_data.email)
+            if retry_after:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please retry later",
+                    headers={"Retry-After": str(math.ceil(retry_after))}
+                )
+        
         # Find user by email
         result = await db.execute(select(User).where(User.email == user_data.email))
         user = result.scalar_one_or_none()
@@ -171,7 +329,7 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
             )
         
         # Verify password
-        if not verify_password(user_data.password, user.hashed_password):
+        if not await verify_password_async(user_data.password, user.hashed_password):
             log_security_event("failed_login_attempt", user_id=user.id, 
                               details={"reason": "invalid_password"})
             raise HTTPException(
@@ -179,14 +337,32 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
                 detail="Incorrect email or password"
             )
         
-        # Verify master key
-        if not verify_master_key(user_data.master_key, user.master_key_hash):
-            log_security_event("failed_login_attempt", user_id=user.id, 
-                              details={"reason": "invalid_master_key"})
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect master key"
+        # An interrupted rotation left rows encrypted under both the old and the new key
+        pending_hash = await pending_rotation_hash(db, user.id)
+        
+        # Verify master key (data written before a MASTER_KEY_SALT change
+        # still verifies against the previous salt until it is rotated)
+        previous_salt = os.getenv("PREVIOUS_MASTER_KEY_SALT")
+        needs_salt_rotation = False
+        if not await verify_master_key_async(user_data.master_key, user.master_key_hash):
+            needs_salt_rotation = bool(previous_salt) and await verify_master_key_async(
+                user_data.master_key, user.master_key_hash, previous_salt
             )
+            if not needs_salt_rotation and pending_hash and await verify_master_key_async(
+                user_data.master_key, pending_hash
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Master key rotation is unfinished, log in with the previous master key "
+                           "as master_key and the new one as new_master_key to resume it"
+                )
+            if not needs_salt_rotation:
+                log_security_event("failed_login_attempt", user_id=user.id, 
+                                  details={"reason": "invalid_master_key"})
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Incorrect master key"
+                )
         
         # Check if user is active
         if not user.is_active:
@@ -195,25 +371,76 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
                 detail="Account is deactivated"
             )
         
-        # Set up encryption manager for this session
-        set_global_encryption_manager(user_data.master_key)
+        # A rotation holds both keys in the keyring; logging in must not replace them
+        if is_rotation_running(user.id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Encryption key rotation in progress, please retry shortly",
+                headers={"Retry-After": "5"}
+            )
+        
+        if pending_hash and not needs_salt_rotation:
+            # Without the new key, rows that were already rotated would be unreadable
+            if not user_data.new_master_key:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Master key rotation is unfinished, log in with new_master_key as well to resume it"
+                )
+            old_manager = await create_encryption_manager_async(user_data.master_key)
+            manager = await create_encryption_manager_async(user_data.new_master_key)
+            restart = await begin_rotation(db, user.id, user_data.new_master_key)
+            get_keyring().put(user.id, manager.with_fallback(old_manager))
+            background_tasks.add_task(rotate_keys_for_user, user.id, old_manager, manager, restart)
+        elif needs_salt_rotation:
+            # Re-encrypt this user's data under the current MASTER_KEY_SALT
+            old_manager = await create_encryption_manager_async(
+                user_data.master_key, previous_salt.encode()
+            )
+            manager = await create_encryption_manager_async(user_data.master_key)
+            restart = await begin_rotation(db, user.id, user_data.master_key)
+            get_keyring().put(user.id, manager.with_fallback(old_manager))
+            background_tasks.add_task(rotate_keys_for_user, user.id, old_manager, manager, restart)
+        else:
+            # Derive (or reuse) this user's encryption key for later requests
+            manager = await get_keyring().get_or_create_async(user.id, user_data.master_key)
+        
+        # Jobs that need the owner's key run right after login
+        if compact_record_mode():
+            from app.jobs.compact_identities import compact_identities_for_user
+            background_tasks.add_task(compact_identities_for_user, user.id, manager)
+        from app.jobs.blind_index_backfill import backfill_blind_indexes_for_user
+        background_tasks.add_task(backfill_blind_indexes_for_user, user.id, manager)
         
-        # Update last login
+        # Update last login and start a refresh session
         user.last_login = datetime.utcnow()
+        await prune_refresh_sessions(db, user.id)
+        refresh_token, family_id = issue_refresh_token(db, user.id)
         await db.commit()
         
-        # Create access token
+        # Create access token (sid ties it to the refresh session for logout)
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": str(user.id)}, expires_delta=access_token_expires
+            data={"sub": str(user.id), "sid": family_id}, expires_delta=access_token_expires
         )
         
         log_security_event("successful_login", user_id=user.id)
         
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
         
     except HTTPException:
         raise
+    except KeyRotationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejected login: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Error during login: {str(e)}")
         raise HTTPException(
@@ -222,8 +449,61 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
         )
 
 
+@router.post("/refresh", response_model=Token)
+async def refresh(refresh_data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    
+    This avoids the password and master key checks of /login. Each refresh
+    token works once; reusing one revokes every token from the same login.
+    """
+    try:
+        user_id, refresh_token, family_id = await rotate_refresh_token(db, refresh_data.refresh_token)
+        
+        user = await db.get(User, user_id)
+        if user is None or not user.is_active:
+            await revoke_refresh_family(db, family_id, user_id)
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Account is deactivated"
+            )
+        
+        # Only login can derive the encryption key; without it the session is of no use
+        # (looking it up also keeps it cached while the session is in use)
+        if get_keyring().get(user_id) is None:
+            await revoke_refresh_family(db, family_id, user_id)
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Encryption key not available, please log in again",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        
+        access_token = create_access_token(
+            data={"sub": str(user_id), "sid": family_id},
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+        
+    except HTTPException:
+        raise
+    except RefreshTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    except Exception as e:
+        logger.error(f"Error refreshing token: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: UserSnapshot = Depends(get_current_user)):
     """Get current user information."""
     return UserResponse(
         id=current_user.id,
@@ -237,8 +517,96 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     )
 
 
+@router.post("/rotate-master-key", status_code=status.HTTP_202_ACCEPTED)
+async def rotate_master_key(
+    rotation: MasterKeyRotation,
+    background_tasks: BackgroundTasks,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Change the user's master key and re-encrypt their data in the background.
+    
+    Calling this again with the same keys resumes an interrupted rotation.
+    """
+    try:
+        user = await db.get(User, current_user.id)
+        if user is None:
+            raise credentials_exception
+        if not await verify_master_key_async(rotation.current_master_key, user.master_key_hash):
+            log_security_event("failed_master_key_rotation", user_id=current_user.id, 
+                              details={"reason": "invalid_master_key"})
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect master key"
+            )
+        
+        if is_rotation_running(current_user.id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Encryption key rotation already in progress"
+            )
+        
+        restart = await begin_rotation(db, current_user.id, rotation.new_master_key)
+        await db.commit()
+        
+        old_manager = await create_encryption_manager_async(rotation.current_master_key)
+        new_manager = await create_encryption_manager_async(rotation.new_master_key)
+        
+        # Requests made while rows are being rotated can read either key
+        get_keyring().put(current_user.id, new_manager.with_fallback(old_manager))
+        background_tasks.add_task(rotate_keys_for_user, current_user.id, old_manager, new_manager, restart)
+        
+        log_security_event("master_key_rotation_started", user_id=current_user.id, 
+                          details={"resumed": not restart})
+        
+        return {"message": "Master key rotation started"}
+        
+    except HTTPException:
+        raise
+    except KeyRotationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejected master key rotation: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        logger.error(f"Error starting master key rotation: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @router.post("/logout")
-async def logout():
-    """Logout user (client should discard token)."""
-    # In a more sophisticated setup, you might want to blacklist the token
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Logout user, revoking the access token and its refresh session."""
+    # A machine key is not a session; it stays valid until revoked under /machine-keys
+    if is_machine_key(credentials.credentials):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Machine keys cannot log out, revoke the key instead"
+        )
+    
+    payload = _decode_token(credentials)
+    if payload.get("sid"):
+        await revoke_refresh_family(db, payload["sid"], current_user.id)
+    if payload.get("jti"):
+        await get_revocation_list().revoke(
+            db, payload["jti"], current_user.id, datetime.utcfromtimestamp(payload["exp"])
+        )
+    else:
+        await db.commit()
+    get_keyring().evict(current_user.id)
+    log_security_event("logout", user_id=current_user.id)
     return {"message": "Successfully logged out"} 
\ No newline at end of file
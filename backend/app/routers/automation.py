@@ -4,9 +4,9 @@ from pydantic import BaseModel
 from typing import List, Optional
 
 from app.database import get_db
-from app.models.user import User
+from app.utils.user_cache import UserSnapshot
 from app.routers.auth import get_current_user
-from app.automation.web_scraper import analyze_website_signup
+from app.automation.analysis_cache import get_analysis_cache
 from app.utils.logging import get_logger, log_automation_event
 
 logger = get_logger(__name__)
@@ -26,7 +26,7 @@ class AnalysisResponse(BaseModel):
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_website(
     request: AnalyzeWebsiteRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Analyze a website's signup process."""
@@ -36,16 +36,18 @@ async def analyze_website(
             "user_id": current_user.id
         }, request.url)
         
-        # For now, return a simplified response
-        # In the full implementation, this would use the web scraper
+        analysis, source = await get_analysis_cache().get_or_analyze(request.url)
         
         return AnalysisResponse(
             success=True,
             message=f"Analysis of {request.url} completed",
             details={
-                "form_found": True,
-                "fields_detected": ["email", "password", "username"],
-                "captcha_present": False
+                "form_found": bool(analysis.fields),
+                "fields_detected": [field.name for field in analysis.fields],
+                "required_fields": [field.name for field in analysis.fields if field.required],
+                "captcha_present": analysis.has_captcha,
+                "cache": source,
+                "tier": analysis.tier
             }
         )
         
@@ -10,8 +10,9 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models.user import User
+from app.utils.user_cache import UserSnapshot
 from app.models.identity import Identity
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, get_current_user_with_identities
 from app.automation.web_scraper import analyze_website_signup
 from app.utils.logging import get_logger, log_automation_event
 
@@ -119,7 +120,7 @@ async def get_ai_response(message: str, context: Dict[str, Any] = None) -> str:
 @router.post("/message", response_model=ChatResponse)
 async def chat_message(
     chat_data: ChatMessage,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_with_identities),
     db: AsyncSession = Depends(get_db)
 ):
     """Process chat message and return response."""
@@ -265,7 +266,7 @@ def generate_suggested_actions(message: str, user: User) -> List[str]:
 @router.post("/signup", response_model=ChatResponse)
 async def initiate_signup(
     signup_data: SignupRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Initiate automated signup process."""
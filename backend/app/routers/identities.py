@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel, EmailStr
@@ -6,11 +6,15 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from app.database import get_db
-from app.models.user import User
+from app.utils.user_cache import UserSnapshot
 from app.models.identity import Identity
-from app.routers.auth import get_current_user
-from app.utils.encryption import encrypt_field, decrypt_field, decrypt_json_field
+from app.routers.auth import get_current_user, get_encryption_manager
+from app.utils.encryption import EncryptionManager
+from app.utils.identity_record import IdentityRecordError, read_identity_fields, write_identity_fields
 from app.utils.logging import get_logger
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, InvalidCursorError, paginate, split_page
+)
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -89,31 +93,22 @@ class IdentityListResponse(BaseModel):
     created_at: datetime
 
 
-def decrypt_identity_data(identity: Identity) -> IdentityResponse:
+async def decrypt_identity_data(identity: Identity, encryption: EncryptionManager) -> IdentityResponse:
     """Decrypt identity data for response."""
     try:
+        data = await read_identity_fields(identity, encryption)
+        
+        for field in ("first_name", "last_name", "email"):
+            data[field] = data[field] or ""
+        
         return IdentityResponse(
             id=identity.id,
             name=identity.name,
             description=identity.description,
-            first_name=decrypt_field(identity.encrypted_first_name) or "",
-            last_name=decrypt_field(identity.encrypted_last_name) or "",
-            email=decrypt_field(identity.encrypted_email) or "",
-            phone=decrypt_field(identity.encrypted_phone),
-            date_of_birth=decrypt_field(identity.encrypted_date_of_birth),
-            address_line1=decrypt_field(identity.encrypted_address_line1),
-            address_line2=decrypt_field(identity.encrypted_address_line2),
-            city=decrypt_field(identity.encrypted_city),
-            state=decrypt_field(identity.encrypted_state),
-            zip_code=decrypt_field(identity.encrypted_zip_code),
-            country=decrypt_field(identity.encrypted_country),
-            profession=decrypt_field(identity.encrypted_profession),
-            company=decrypt_field(identity.encrypted_company),
-            bio=decrypt_field(identity.encrypted_bio),
-            custom_fields=decrypt_json_field(identity.encrypted_custom_fields),
             preferred_username_pattern=identity.preferred_username_pattern,
             created_at=identity.created_at,
-            updated_at=identity.updated_at
+            updated_at=identity.updated_at,
+            **data
         )
     except Exception as e:
         logger.error(f"Error decrypting identity data: {str(e)}")
@@ -126,7 +121,8 @@ def decrypt_identity_data(identity: Identity) -> IdentityResponse:
 @router.post("/", response_model=IdentityResponse)
 async def create_identity(
     identity_data: IdentityCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
+    encryption: EncryptionManager = Depends(get_encryption_manager),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new identity."""
@@ -136,23 +132,12 @@ async def create_identity(
             user_id=current_user.id,
             name=identity_data.name,
             description=identity_data.description,
-            encrypted_first_name=encrypt_field(identity_data.first_name),
-            encrypted_last_name=encrypt_field(identity_data.last_name),
-            encrypted_email=encrypt_field(identity_data.email),
-            encrypted_phone=encrypt_field(identity_data.phone) if identity_data.phone else None,
-            encrypted_date_of_birth=encrypt_field(identity_data.date_of_birth) if identity_data.date_of_birth else None,
-            encrypted_address_line1=encrypt_field(identity_data.address_line1) if identity_data.address_line1 else None,
-            encrypted_address_line2=encrypt_field(identity_data.address_line2) if identity_data.address_line2 else None,
-            encrypted_city=encrypt_field(identity_data.city) if identity_data.city else None,
-            encrypted_state=encrypt_field(identity_data.state) if identity_data.state else None,
-            encrypted_zip_code=encrypt_field(identity_data.zip_code) if identity_data.zip_code else None,
-            encrypted_country=encrypt_field(identity_data.country) if identity_data.country else None,
-            encrypted_profession=encrypt_field(identity_data.profession) if identity_data.profession else None,
-            encrypted_company=encrypt_field(identity_data.company) if identity_data.company else None,
-            encrypted_bio=encrypt_field(identity_data.bio) if identity_data.bio else None,
-            encrypted_custom_fields=encrypt_field(identity_data.custom_fields) if identity_data.custom_fields else None,
             preferred_username_pattern=identity_data.preferred_username_pattern
         )
+        await write_identity_fields(new_identity, encryption, {
+            field: getattr(identity_data, field) or None
+            for field in Identity.ENCRYPTED_FIELDS
+        })
         
         db.add(new_identity)
         await db.commit()
@@ -160,7 +145,7 @@ async def create_identity(
         
         logger.info(f"Created identity {new_identity.id} for user {current_user.id}")
         
-        return decrypt_identity_data(new_identity)
+        return await decrypt_identity_data(new_identity, encryption)
         
     except Exception as e:
         logger.error(f"Error creating identity: {str(e)}")
@@ -172,15 +157,27 @@ async def create_identity(
 
 @router.get("/", response_model=List[IdentityListResponse])
 async def list_identities(
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all identities for the current user."""
+    """
+    List the current user's identities, oldest first.
+    
+    Pass the X-Next-Cursor response header back as ``cursor`` for the next page.
+    """
     try:
         result = await db.execute(
-            select(Identity).where(Identity.user_id == current_user.id)
+            paginate(
+                select(Identity).where(Identity.user_id == current_user.id),
+                Identity, cursor, limit, db.get_bind().dialect.name
+            )
         )
-        identities = result.scalars().all()
+        identities, next_cursor = split_page(result.scalars().all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
         return [
             IdentityListResponse(
@@ -192,6 +189,11 @@ async def list_identities(
             for identity in identities
         ]
         
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error listing identities: {str(e)}")
         raise HTTPException(
@@ -200,10 +202,55 @@ async def list_identities(
         )
 
 
+@router.get("/search", response_model=List[IdentityListResponse])
+async def search_identities(
+    email: Optional[str] = Query(None),
+    phone: Optional[str] = Query(None),
+    current_user: UserSnapshot = Depends(get_current_user),
+    encryption: EncryptionManager = Depends(get_encryption_manager),
+    db: AsyncSession = Depends(get_db)
+):
+    """Find the current user's identities by exact email and/or phone."""
+    if not email and not phone:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide an email or phone to search for"
+        )
+    
+    try:
+        # Equality lookups go through the blind-index columns, never decryption
+        query = select(Identity).where(Identity.user_id == current_user.id)
+        if email:
+            query = query.where(Identity.email_bidx == encryption.blind_index(email, "email"))
+        if phone:
+            query = query.where(Identity.phone_bidx == encryption.blind_index(phone, "phone"))
+        
+        result = await db.execute(query)
+        identities = result.scalars().all()
+        
+        return [
+            IdentityListResponse(
+                id=identity.id,
+                name=identity.name,
+                description=identity.description,
+                created_at=identity.created_at
+            )
+            for identity in identities
+        ]
+        
+    except Exception as e:
+        logger.error(f"Error searching identities: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching identities"
+        )
+
+
 @router.get("/{identity_id}", response_model=IdentityResponse)
 async def get_identity(
     identity_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
+    encryption: EncryptionManager = Depends(get_encryption_manager),
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific identity."""
@@ -221,7 +268,7 @@ async def get_identity(
                 detail="Identity not found"
             )
         
-        return decrypt_identity_data(identity)
+        return await decrypt_identity_data(identity, encryption)
         
     except HTTPException:
         raise
@@ -237,7 +284,8 @@ async def get_identity(
 async def update_identity(
     identity_id: int,
     identity_data: IdentityUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
+    encryption: EncryptionManager = Depends(get_encryption_manager),
     db: AsyncSession = Depends(get_db)
 ):
     """Update an identity."""
@@ -260,36 +308,15 @@ async def update_identity(
             identity.name = identity_data.name
         if identity_data.description is not None:
             identity.description = identity_data.description
-        if identity_data.first_name is not None:
-            identity.encrypted_first_name = encrypt_field(identity_data.first_name)
-        if identity_data.last_name is not None:
-            identity.encrypted_last_name = encrypt_field(identity_data.last_name)
-        if identity_data.email is not None:
-            identity.encrypted_email = encrypt_field(identity_data.email)
-        if identity_data.phone is not None:
-            identity.encrypted_phone = encrypt_field(identity_data.phone)
-        if identity_data.date_of_birth is not None:
-            identity.encrypted_date_of_birth = encrypt_field(identity_data.date_of_birth)
-        if identity_data.address_line1 is not None:
-            identity.encrypted_address_line1 = encrypt_field(identity_data.address_line1)
-        if identity_data.address_line2 is not None:
-            identity.encrypted_address_line2 = encrypt_field(identity_data.address_line2)
-        if identity_data.city is not None:
-            identity.encrypted_city = encrypt_field(identity_data.city)
-        if identity_data.state is not None:
-            identity.encrypted_state = encrypt_field(identity_data.state)
-        if identity_data.zip_code is not None:
-            identity.encrypted_zip_code = encrypt_field(identity_data.zip_code)
-        if identity_data.country is not None:
-            identity.encrypted_country = encrypt_field(identity_data.country)
-        if identity_data.profession is not None:
-            identity.encrypted_profession = encrypt_field(identity_data.profession)
-        if identity_data.company is not None:
-            identity.encrypted_company = encrypt_field(identity_data.company)
-        if identity_data.bio is not None:
-            identity.encrypted_bio = encrypt_field(identity_data.bio)
-        if identity_data.custom_fields is not None:
-            identity.encrypted_custom_fields = encrypt_field(identity_data.custom_fields)
+        
+        updates = {
+            field: getattr(identity_data, field)
+            for field in Identity.ENCRYPTED_FIELDS
+            if getattr(identity_data, field) is not None
+        }
+        if updates:
+            await write_identity_fields(identity, encryption, updates)
+        
         if identity_data.preferred_username_pattern is not None:
             identity.preferred_username_pattern = identity_data.preferred_username_pattern
         
@@ -298,10 +325,16 @@ async def update_identity(
         
         logger.info(f"Updated identity {identity_id} for user {current_user.id}")
         
-        return decrypt_identity_data(identity)
+        return await decrypt_identity_data(identity, encryption)
         
     except HTTPException:
         raise
+    except IdentityRecordError as e:
+        logger.error(f"Refusing to update identity {identity_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Stored identity data cannot be decrypted with the current key"
+        )
     except Exception as e:
         logger.error(f"Error updating identity {identity_id}: {str(e)}")
         raise HTTPException(
@@ -313,7 +346,7 @@ async def update_identity(
 @router.delete("/{identity_id}")
 async def delete_identity(
     identity_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete an identity."""
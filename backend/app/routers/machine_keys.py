@@ -0,0 +1,168 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime, timedelta
+
+from app.database import get_db
+from app.models.machine_key import MachineKey
+from app.routers.auth import get_current_user, get_encryption_manager, security
+from app.utils.encryption import EncryptionManager, get_keyring
+from app.utils.logging import get_logger, log_security_event
+from app.utils.machine_keys import (
+    generate_machine_key, hash_secret, is_machine_key, keyring_fingerprint, wrapping_key
+)
+from app.utils.user_cache import UserSnapshot
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+
+class MachineKeyCreate(BaseModel):
+    name: str
+    expires_in_days: Optional[int] = None
+
+
+class MachineKeyResponse(BaseModel):
+    id: int
+    name: str
+    prefix: str
+    usage_count: int
+    last_used: Optional[datetime]
+    is_active: bool
+    expires_at: Optional[datetime]
+    created_at: datetime
+
+
+class MachineKeyCreated(MachineKeyResponse):
+    key: str
+
+
+def require_interactive_login(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Only a user login may manage machine keys, so a leaked key cannot mint more."""
+    if is_machine_key(credentials.credentials):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Machine keys cannot manage machine keys"
+        )
+
+
+def _to_response(machine_key: MachineKey) -> dict:
+    return dict(
+        id=machine_key.id,
+        name=machine_key.name,
+        prefix=machine_key.prefix,
+        usage_count=machine_key.usage_count,
+        last_used=machine_key.last_used,
+        is_active=machine_key.is_active and machine_key.revoked_at is None,
+        expires_at=machine_key.expires_at,
+        created_at=machine_key.created_at,
+    )
+
+
+@router.post("/", response_model=MachineKeyCreated, dependencies=[Depends(require_interactive_login)])
+async def create_machine_key(
+    key_data: MachineKeyCreate,
+    current_user: UserSnapshot = Depends(get_current_user),
+    manager: EncryptionManager = Depends(get_encryption_manager),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create a machine key for scripts.
+
+    The key is returned only once. Send it as ``Authorization: Bearer <key>``.
+    """
+    try:
+        key, prefix, secret = generate_machine_key()
+        expires_at = None
+        if key_data.expires_in_days:
+            expires_at = datetime.utcnow() + timedelta(days=key_data.expires_in_days)
+
+        machine_key = MachineKey(
+            user_id=current_user.id,
+            name=key_data.name,
+            prefix=prefix,
+            secret_hash=hash_secret(secret),
+            wrapped_data_key=manager.wrap_key(wrapping_key(secret)),
+            expires_at=expires_at,
+        )
+        db.add(machine_key)
+        await db.commit()
+        await db.refresh(machine_key)
+
+        log_security_event("machine_key_created", user_id=current_user.id,
+                          details={"machine_key_id": machine_key.id, "prefix": prefix})
+
+        return MachineKeyCreated(key=key, **_to_response(machine_key))
+
+    except Exception as e:
+        logger.error(f"Error creating machine key: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error creating machine key"
+        )
+
+
+@router.get("/", response_model=List[MachineKeyResponse])
+async def list_machine_keys(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the current user's machine keys (without their secrets)."""
+    try:
+        result = await db.execute(
+            select(MachineKey).where(MachineKey.user_id == current_user.id).order_by(MachineKey.id)
+        )
+        return [MachineKeyResponse(**_to_response(machine_key)) for machine_key in result.scalars().all()]
+
+    except Exception as e:
+        logger.error(f"Error listing machine keys: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error retrieving machine keys"
+        )
+
+
+@router.delete("/{key_id}", dependencies=[Depends(require_interactive_login)])
+async def revoke_machine_key(
+    key_id: int,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke a machine key."""
+    try:
+        result = await db.execute(
+            select(MachineKey).where(
+                (MachineKey.id == key_id) & (MachineKey.user_id == current_user.id)
+            )
+        )
+        machine_key = result.scalar_one_or_none()
+
+        if not machine_key:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Machine key not found"
+            )
+
+        machine_key.is_active = False
+        machine_key.revoked_at = datetime.utcnow()
+        await db.commit()
+
+        # Drop the data key unwrapped by this machine key, if it is the one cached
+        get_keyring().evict(current_user.id, keyring_fingerprint(machine_key.id))
+
+        log_security_event("machine_key_revoked", user_id=current_user.id,
+                          details={"machine_key_id": key_id})
+
+        return {"message": "Machine key revoked successfully"}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error revoking machine key {key_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error revoking machine key"
+        )
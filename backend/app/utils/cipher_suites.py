@@ -0,0 +1,125 @@
+"""
+Cipher suites used by EncryptionManager.
+
+Every suite turns plaintext bytes into self-describing binary ciphertext:
+
+* Fernet (AES-128-CBC + HMAC-SHA256): the raw Fernet token, which always
+  starts with Fernet's own version byte 0x80.
+* AEAD suites: ``[suite id][flags][12-byte nonce][ciphertext + 16-byte tag]``,
+  where the flags byte is authenticated along with the suite id. Bit 0
+  (FLAG_ZLIB) marks a plaintext that was zlib-compressed before encryption.
+
+The first byte therefore identifies the suite, so data written with any
+suite stays readable after the write suite is changed.
+"""
+import base64
+import os
+from typing import Dict, Type
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+FERNET_VERSION_BYTE = 0x80
+NONCE_SIZE = 12
+FLAG_ZLIB = 0x01
+
+
+class CipherSuite:
+    """Base class for a cipher suite keyed from the user's derived key."""
+
+    name: str = ""
+    suite_id: int = 0
+    supports_flags: bool = False
+
+    def __init__(self, derived_key: bytes):
+        self.derived_key = derived_key
+
+    def encrypt(self, data: bytes, flags: int = 0) -> bytes:
+        """Encrypt bytes and return the binary ciphertext."""
+        raise NotImplementedError
+
+    def decrypt(self, data: bytes) -> bytes:
+        """Decrypt binary ciphertext; raises on tampering or a wrong key."""
+        raise NotImplementedError
+
+
+class FernetSuite(CipherSuite):
+    """Fernet (AES-128-CBC + HMAC-SHA256), the original storage format."""
+
+    name = "fernet"
+    suite_id = FERNET_VERSION_BYTE
+
+    def __init__(self, derived_key: bytes):
+        super().__init__(derived_key)
+        self._fernet = Fernet(base64.urlsafe_b64encode(derived_key))
+
+    def encrypt(self, data: bytes, flags: int = 0) -> bytes:
+        if flags:
+            raise ValueError("Fernet ciphertexts cannot carry header flags")
+        return base64.urlsafe_b64decode(self._fernet.encrypt(data))
+
+    def decrypt(self, data: bytes) -> bytes:
+        return self._fernet.decrypt(base64.urlsafe_b64encode(data))
+
+
+class AeadSuite(CipherSuite):
+    """AEAD suite with a random 96-bit nonce and the header authenticated."""
+
+    aead_class: Type = AESGCM
+    supports_flags = True
+
+    def __init__(self, derived_key: bytes):
+        super().__init__(derived_key)
+        # Give every suite its own subkey so the same key is never shared
+        # between algorithms
+        subkey = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=f"signmeup/{self.name}".encode(),
+        ).derive(derived_key)
+        self._aead = self.aead_class(subkey)
+
+    def encrypt(self, data: bytes, flags: int = 0) -> bytes:
+        header = bytes([self.suite_id, flags])
+        nonce = os.urandom(NONCE_SIZE)
+        return header + nonce + self._aead.encrypt(nonce, data, header)
+
+    def decrypt(self, data: bytes) -> bytes:
+        header = data[:2]
+        nonce = data[2:2 + NONCE_SIZE]
+        return self._aead.decrypt(nonce, data[2 + NONCE_SIZE:], header)
+
+
+class AesGcmSuite(AeadSuite):
+    """AES-256-GCM."""
+
+    name = "aes-256-gcm"
+    suite_id = 0x01
+    aead_class = AESGCM
+
+
+class ChaCha20Poly1305Suite(AeadSuite):
+    """ChaCha20-Poly1305 (fast without AES hardware acceleration)."""
+
+    name = "chacha20-poly1305"
+    suite_id = 0x02
+    aead_class = ChaCha20Poly1305
+
+
+CIPHER_SUITES: Dict[str, Type[CipherSuite]] = {
+    suite.name: suite for suite in (FernetSuite, AesGcmSuite, ChaCha20Poly1305Suite)
+}
+SUITES_BY_ID: Dict[int, Type[CipherSuite]] = {
+    suite.suite_id: suite for suite in CIPHER_SUITES.values()
+}
+
+
+def get_suite_class(name: str) -> Type[CipherSuite]:
+    """Look up a cipher suite by name."""
+    try:
+        return CIPHER_SUITES[name]
+    except KeyError:
+        raise ValueError(f"Unknown cipher suite: {name}") from None
@@ -0,0 +1,141 @@
+"""
+Bounded worker pools for CPU-heavy work (password hashing, key derivation).
+
+Work submitted from async handlers runs on a thread or process pool so the
+event loop keeps serving other requests. Each pool caps how many calls may
+be running or queued at once and rejects the rest with PoolSaturatedError,
+so a burst degrades into fast 503s instead of an ever-growing backlog.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a CPU pool already has its maximum amount of queued work."""
+
+    def __init__(self, pool_name: str, retry_after: int = 1):
+        super().__init__(f"{pool_name} pool is saturated")
+        self.retry_after = retry_after
+
+
+def _timed_call(func: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, float]:
+    """Run func in the worker and report how long it took there."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class CpuPool:
+    """Thread or process pool with queue-depth limits and timing metrics."""
+
+    def __init__(self, name: str, kind: str = "thread", max_workers: Optional[int] = None, max_queue: int = 64):
+        """
+        Initialize the pool.
+
+        Args:
+            name: Name used in metrics and errors
+            kind: "thread" or "process"
+            max_workers: Number of workers (defaults to the CPU count)
+            max_queue: Calls allowed to wait for a worker before rejecting
+        """
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_wait = 0.0
+        self.max_run = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run func(*args) on the pool.
+
+        Raises:
+            PoolSaturatedError: If all workers are busy and the queue is full
+        """
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(self.name)
+
+        self.in_flight += 1
+        self.submitted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        submitted_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_time = await loop.run_in_executor(self._get_executor(), _timed_call, func, args)
+        finally:
+            self.in_flight -= 1
+
+        wait_time = max(0.0, time.perf_counter() - submitted_at - run_time)
+        self.completed += 1
+        self.total_wait += wait_time
+        self.total_run += run_time
+        self.max_wait = max(self.max_wait, wait_time)
+        self.max_run = max(self.max_run, run_time)
+        return result
+
+    def average_run_time(self) -> float:
+        """Average time a call spends executing on a worker, in seconds."""
+        return self.total_run / self.completed if self.completed else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and timing metrics."""
+        completed = self.completed or 1
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.total_wait / completed * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+            "avg_run_ms": self.total_run / completed * 1000,
+            "max_run_ms": self.max_run * 1000,
+        }
+
+    def shutdown(self):
+        """Shut down the underlying executor."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Pool for password hashing and master key derivation
+_auth_pool: Optional[CpuPool] = None
+
+
+def get_auth_pool() -> CpuPool:
+    """Get the pool used for bcrypt and PBKDF2 work."""
+    global _auth_pool
+    if _auth_pool is None:
+        workers = os.getenv("AUTH_POOL_WORKERS")
+        _auth_pool = CpuPool(
+            "auth",
+            kind=os.getenv("AUTH_POOL_KIND", "thread").lower(),
+            max_workers=int(workers) if workers else None,
+            max_queue=int(os.getenv("AUTH_POOL_MAX_QUEUE", "64")),
+        )
+    return _auth_pool
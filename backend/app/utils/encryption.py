@@ -1,42 +1,153 @@
-from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
+import asyncio
 import base64
+import hashlib
+import hmac
 import os
 import json
-from typing import Optional, Any, Dict
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, Token
+from typing import Optional, Any, Callable, Dict, List, Sequence, Tuple
 from passlib.context import CryptContext
 
+from app.utils.cipher_suites import CipherSuite, FLAG_ZLIB, SUITES_BY_ID, get_suite_class
+from app.utils.cpu_pool import get_auth_pool
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Bulk field encryption/decryption runs in chunks on a worker pool so large
+# result sets do not stall the event loop
+CRYPTO_BATCH_SIZE = int(os.getenv("CRYPTO_BATCH_SIZE", "256"))
+_crypto_executor: Optional[ThreadPoolExecutor] = None
+_crypto_executor_lock = threading.Lock()
+
+
+# Format version byte prefixed to single-envelope encrypted records
+RECORD_FORMAT_VERSION = 1
+
+# Single-encoded values are urlsafe base64 of the binary ciphertext. Older
+# releases base64-encoded Fernet tokens ("gAAAAA...") a second time, which
+# yields the prefix below. "single" stores one layer of encoding; "legacy"
+# keeps writing the old double-encoded Fernet format.
+CIPHERTEXT_ENCODING = os.getenv("CIPHERTEXT_ENCODING", "single").lower()
+LEGACY_PREFIX = "Z0FBQUFB"
+
+# Cipher suite for new writes; existing data in any suite stays readable
+DEFAULT_CIPHER_SUITE = "fernet" if CIPHERTEXT_ENCODING == "legacy" else os.getenv("ENCRYPTION_SUITE", "aes-256-gcm")
+
+# Compress-then-encrypt for large values such as bios, notes and JSON blobs.
+# Only AEAD suites can flag a compressed plaintext, and values shorter than
+# COMPRESSION_MIN_BYTES (or that do not shrink) are stored uncompressed.
+COMPRESSION_ENABLED = os.getenv("ENCRYPTION_COMPRESSION", "off").lower() == "zlib"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "512"))
+COMPRESSION_LEVEL = 6
+
+
+def is_legacy_ciphertext(encrypted_data: str) -> bool:
+    """Check whether a stored value uses the legacy double base64 encoding."""
+    return bool(encrypted_data) and encrypted_data.startswith(LEGACY_PREFIX)
+
+
+def strip_legacy_encoding(encrypted_data: str) -> str:
+    """
+    Convert a legacy double-encoded value to a single-encoded Fernet token.
+
+    Values that are already single-encoded are returned unchanged, so this
+    is safe to run repeatedly.
+    """
+    if not is_legacy_ciphertext(encrypted_data):
+        return encrypted_data
+    try:
+        return base64.urlsafe_b64decode(encrypted_data.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        return encrypted_data
+
+
+def get_crypto_executor() -> ThreadPoolExecutor:
+    """Get the worker pool used for bulk encryption and decryption."""
+    global _crypto_executor
+    if _crypto_executor is None:
+        with _crypto_executor_lock:
+            if _crypto_executor is None:
+                workers = int(os.getenv("CRYPTO_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+                _crypto_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crypto")
+    return _crypto_executor
+
+
+def _map_chunk(func: Callable[[Any], Any], chunk: Sequence[Any]) -> List[Any]:
+    return [None if value is None else func(value) for value in chunk]
+
+
+def normalize_for_index(value: str, kind: str) -> str:
+    """Normalize a value so equal emails, usernames or phones index identically."""
+    value = value.strip()
+    if kind == "phone":
+        return re.sub(r"\D", "", value)
+    return value.lower()
+
+
+def derive_key(master_key: str, salt: bytes) -> bytes:
+    """Derive the 32-byte data key from a master key (PBKDF2, CPU heavy)."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+        backend=default_backend()
+    )
+    return kdf.derive(master_key.encode())
+
+
 class EncryptionManager:
     """Manager for handling encryption and decryption of sensitive data."""
     
-    def __init__(self, master_key: str, salt: Optional[bytes] = None):
+    def __init__(
+        self,
+        master_key: str,
+        salt: Optional[bytes] = None,
+        derived_key: Optional[bytes] = None,
+        suite: Optional[str] = None,
+        fallback: Optional["EncryptionManager"] = None,
+        compress: Optional[bool] = None,
+    ):
         """
         Initialize encryption manager with master key.
         
         Args:
             master_key: The master key for encryption
             salt: Salt for key derivation (if None, uses default from env)
+            derived_key: Key already derived with derive_key (skips PBKDF2)
+            suite: Cipher suite for new writes (defaults to ENCRYPTION_SUITE)
+            fallback: Manager tried when decryption with this key fails
+                (used while data is being re-encrypted under a new key)
+            compress: Compress large values before encryption (defaults to
+                ENCRYPTION_COMPRESSION=zlib)
         """
         self.master_key = master_key
         self.salt = salt or os.getenv("MASTER_KEY_SALT", "default_salt").encode()
-        self._fernet = self._create_fernet_key()
+        self._derived_key = derived_key or derive_key(self.master_key, self.salt)
+        self.fallback = fallback
+        self.compress = COMPRESSION_ENABLED if compress is None else compress
+        self._suites: Dict[int, CipherSuite] = {}
+        self._index_key: Optional[bytes] = None
+        self.suite = self._get_suite(get_suite_class(suite or DEFAULT_CIPHER_SUITE).suite_id)
     
-    def _create_fernet_key(self) -> Fernet:
-        """Create Fernet encryption key from master key and salt."""
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=self.salt,
-            iterations=100000,
-            backend=default_backend()
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(self.master_key.encode()))
-        return Fernet(key)
+    def _get_suite(self, suite_id: int) -> CipherSuite:
+        """Get (creating on first use) the cipher suite for a suite id."""
+        suite = self._suites.get(suite_id)
+        if suite is None:
+            suite = SUITES_BY_ID[suite_id](self._derived_key)
+            self._suites[suite_id] = suite
+        return suite
     
     def encrypt(self, data: Any) -> str:
         """
@@ -46,7 +157,8 @@ class EncryptionManager:
             data: Data to encrypt (will be JSON serialized if not string)
             
         Returns:
-            Base64 encoded encrypted string
+            Urlsafe base64 of the binary ciphertext (double encoded if
+            CIPHERTEXT_ENCODING=legacy)
         """
         if data is None:
             return ""
@@ -58,15 +170,17 @@ class EncryptionManager:
             plain_text = json.dumps(data)
         
         # Encrypt and encode
-        encrypted_bytes = self._fernet.encrypt(plain_text.encode())
-        return base64.urlsafe_b64encode(encrypted_bytes).decode()
+        encoded = base64.urlsafe_b64encode(self.encrypt_bytes(plain_text.encode()))
+        if CIPHERTEXT_ENCODING == "legacy":
+            encoded = base64.urlsafe_b64encode(encoded)
+        return encoded.decode()
     
     def decrypt(self, encrypted_data: str) -> Optional[str]:
         """
         Decrypt base64 encoded encrypted string.
         
         Args:
-            encrypted_data: Base64 encoded encrypted string
+            encrypted_data: Ciphertext in any suite, single or legacy double encoded
             
         Returns:
             Decrypted string or None if decryption fails
@@ -75,13 +189,166 @@ class EncryptionManager:
             return None
         
         try:
-            # Decode and decrypt
-            encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
-            decrypted_bytes = self._fernet.decrypt(encrypted_bytes)
-            return decrypted_bytes.decode()
+            # Unwrap the legacy outer base64 layer, then decode and decrypt
+            encrypted_data = strip_legacy_encoding(encrypted_data)
+            decrypted_bytes = self.decrypt_bytes(base64.urlsafe_b64decode(encrypted_data.encode()))
+            return decrypted_bytes.decode() if decrypted_bytes is not None else None
         except Exception:
             return None
     
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """Encrypt raw bytes with the write suite and return the binary ciphertext."""
+        flags = 0
+        if self.compress and self.suite.supports_flags and len(data) >= COMPRESSION_MIN_BYTES:
+            compressed = zlib.compress(data, COMPRESSION_LEVEL)
+            if len(compressed) < len(data):
+                data, flags = compressed, FLAG_ZLIB
+        return self.suite.encrypt(data, flags)
+
+    def decrypt_bytes(self, data: bytes) -> Optional[bytes]:
+        """Decrypt binary ciphertext in any suite, returning None if decryption fails."""
+        if not data or data[0] not in SUITES_BY_ID:
+            return None
+
+        try:
+            suite = self._get_suite(data[0])
+            decrypted = suite.decrypt(data)
+            if suite.supports_flags and data[1] & FLAG_ZLIB:
+                decrypted = zlib.decompress(decrypted)
+            return decrypted
+        except Exception:
+            if self.fallback is not None:
+                return self.fallback.decrypt_bytes(data)
+            return None
+
+    def with_fallback(self, fallback: Optional["EncryptionManager"]) -> "EncryptionManager":
+        """Return a manager sharing this key that falls back to another key for reads."""
+        return EncryptionManager(
+            self.master_key, self.salt, derived_key=self._derived_key,
+            suite=self.suite.name, fallback=fallback, compress=self.compress
+        )
+
+    def wrap_key(self, wrapping_key: bytes) -> str:
+        """
+        Encrypt this manager's derived key under another 32-byte key.
+
+        Lets a credential other than the master key (e.g. a machine key)
+        recover the data key without running PBKDF2.
+        """
+        wrapper = EncryptionManager("", self.salt, derived_key=wrapping_key, compress=False)
+        return base64.urlsafe_b64encode(wrapper.encrypt_bytes(self._derived_key)).decode()
+
+    @classmethod
+    def from_wrapped_key(cls, wrapped: str, wrapping_key: bytes) -> Optional["EncryptionManager"]:
+        """Rebuild a manager from a key produced by wrap_key, or None if it does not decrypt."""
+        wrapper = cls("", derived_key=wrapping_key, compress=False)
+        derived_key = wrapper.decrypt_bytes(base64.urlsafe_b64decode(wrapped))
+        if derived_key is None:
+            return None
+        return cls("", derived_key=derived_key)
+
+    def encrypt_record(self, record: Dict[str, Any]) -> bytes:
+        """
+        Serialize a dict of fields and encrypt it as a single versioned blob.
+
+        Args:
+            record: Field names mapped to JSON-serializable values
+
+        Returns:
+            Format version byte followed by the binary ciphertext
+        """
+        payload = json.dumps(record, separators=(",", ":")).encode()
+        return bytes([RECORD_FORMAT_VERSION]) + self.encrypt_bytes(payload)
+
+    def decrypt_record(self, blob: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Decrypt a blob produced by encrypt_record.
+
+        Args:
+            blob: Format version byte followed by the binary ciphertext
+
+        Returns:
+            Decrypted dict of fields or None if the blob is unreadable
+        """
+        if not blob or blob[0] != RECORD_FORMAT_VERSION:
+            return None
+
+        decrypted_bytes = self.decrypt_bytes(blob[1:])
+        if decrypted_bytes is None:
+            return None
+
+        try:
+            return json.loads(decrypted_bytes)
+        except json.JSONDecodeError:
+            return None
+
+    async def encrypt_many(self, values: Sequence[Any], chunk_size: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Encrypt a batch of values on the crypto worker pool.
+
+        Args:
+            values: Values to encrypt; None entries are passed through as None
+            chunk_size: Number of values per worker task (defaults to CRYPTO_BATCH_SIZE)
+
+        Returns:
+            Encrypted strings in the same order as ``values``
+        """
+        return await self._run_chunked(self.encrypt, values, chunk_size)
+
+    async def decrypt_many(self, values: Sequence[Optional[str]], chunk_size: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Decrypt a batch of values on the crypto worker pool.
+
+        Args:
+            values: Encrypted strings; None or empty entries decrypt to None
+            chunk_size: Number of values per worker task (defaults to CRYPTO_BATCH_SIZE)
+
+        Returns:
+            Decrypted strings in the same order as ``values``
+        """
+        return await self._run_chunked(self.decrypt, values, chunk_size)
+
+    async def _run_chunked(self, func: Callable[[Any], Any], values: Sequence[Any], chunk_size: Optional[int]) -> List[Any]:
+        """Split values into chunks, process them on the pool and reassemble in order."""
+        values = list(values)
+        if not values:
+            return []
+
+        size = chunk_size or CRYPTO_BATCH_SIZE
+        loop = asyncio.get_running_loop()
+        executor = get_crypto_executor()
+        chunks = [values[i:i + size] for i in range(0, len(values), size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(executor, _map_chunk, func, chunk) for chunk in chunks)
+        )
+        return [item for chunk in results for item in chunk]
+
+    def blind_index(self, value: Optional[str], kind: str) -> Optional[str]:
+        """
+        Compute a deterministic, keyed blind index for equality lookups.
+
+        Args:
+            value: Plaintext value (email, username or phone)
+            kind: Kind of value; selects normalization and separates index domains
+
+        Returns:
+            Hex HMAC-SHA256 digest (128 bits) or None for empty values
+        """
+        if not value:
+            return None
+        normalized = normalize_for_index(value, kind)
+        if not normalized:
+            return None
+        if self._index_key is None:
+            self._index_key = HKDF(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=None,
+                info=b"signmeup/blind-index",
+            ).derive(self._derived_key)
+        digest = hmac.new(self._index_key, f"{kind}:{normalized}".encode(), hashlib.sha256)
+        return digest.hexdigest()[:32]
+
     def decrypt_json(self, encrypted_data: str) -> Optional[Dict]:
         """
         Decrypt and parse JSON data.
@@ -128,42 +395,232 @@ def verify_master_key(master_key: str, stored_hash: str, salt: Optional[str] = N
     return verify_password(master_key + salt, stored_hash)
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the auth CPU pool."""
+    return await get_auth_pool().run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the auth CPU pool."""
+    return await get_auth_pool().run(verify_password, plain_password, hashed_password)
+
+
+async def generate_master_key_hash_async(master_key: str, salt: Optional[str] = None) -> str:
+    """Hash a master key for storage on the auth CPU pool."""
+    return await get_auth_pool().run(generate_master_key_hash, master_key, salt)
+
+
+async def verify_master_key_async(master_key: str, stored_hash: str, salt: Optional[str] = None) -> bool:
+    """Verify a master key on the auth CPU pool."""
+    return await get_auth_pool().run(verify_master_key, master_key, stored_hash, salt)
+
+
 def create_encryption_manager(master_key: str) -> EncryptionManager:
     """Create an encryption manager instance."""
     return EncryptionManager(master_key)
 
 
-# Global encryption manager (will be set after user authentication)
-_global_encryption_manager: Optional[EncryptionManager] = None
+async def create_encryption_manager_async(master_key: str, salt: Optional[bytes] = None) -> EncryptionManager:
+    """Create an encryption manager, deriving its key on the auth CPU pool."""
+    salt = salt or os.getenv("MASTER_KEY_SALT", "default_salt").encode()
+    key = await get_auth_pool().run(derive_key, master_key, salt)
+    return EncryptionManager(master_key, salt, derived_key=key)
 
 
-def set_global_encryption_manager(master_key: str):
-    """Set the global encryption manager for the current user session."""
-    global _global_encryption_manager
-    _global_encryption_manager = EncryptionManager(master_key)
+class KeyRing:
+    """
+    Bounded, TTL-expiring LRU cache of per-user encryption managers.
 
+    Building an EncryptionManager runs PBKDF2 (100,000 iterations), so the
+    derived key is cached per user and reused on repeat logins and
+    per-request lookups. Entries expire after ``ttl_seconds`` of inactivity
+    and the least recently used entry is evicted once ``max_size`` is reached.
+    """
 
-def get_global_encryption_manager() -> Optional[EncryptionManager]:
-    """Get the global encryption manager."""
-    return _global_encryption_manager
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[bytes, EncryptionManager, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
+    @staticmethod
+    def _fingerprint(master_key: str, salt: bytes) -> bytes:
+        """Fingerprint a master key so a changed key never reuses a stale entry."""
+        return hashlib.sha256(salt + b"\x00" + master_key.encode()).digest()
 
-def encrypt_field(data: Any) -> str:
-    """Encrypt a field using the global encryption manager."""
-    if _global_encryption_manager is None:
+    def _pop_expired(self, user_id: int, now: float) -> Optional[Tuple[bytes, EncryptionManager, float]]:
+        """Return a live entry for the user, dropping it if it has expired."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if now - entry[2] > self.ttl_seconds:
+            del self._entries[user_id]
+            self.evictions += 1
+            return None
+        return entry
+
+    def get(self, user_id: int) -> Optional[EncryptionManager]:
+        """Get the cached encryption manager for a user, if present."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pop_expired(user_id, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[user_id] = (entry[0], entry[1], now)
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def _lookup(self, user_id: int, fingerprint: bytes) -> Optional[EncryptionManager]:
+        """Return the cached manager if it was derived from the same master key."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pop_expired(user_id, now)
+            if entry is not None and hmac.compare_digest(entry[0], fingerprint):
+                self._entries[user_id] = (entry[0], entry[1], now)
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def get_or_create(self, user_id: int, master_key: str, salt: Optional[bytes] = None) -> EncryptionManager:
+        """
+        Get the encryption manager for a user, deriving the key only on a miss.
+
+        Args:
+            user_id: ID of the authenticated user
+            master_key: The user's (already verified) master key
+            salt: Salt for key derivation (if None, uses default from env)
+
+        Returns:
+            Encryption manager holding the user's derived key
+        """
+        salt = salt or os.getenv("MASTER_KEY_SALT", "default_salt").encode()
+        fingerprint = self._fingerprint(master_key, salt)
+        manager = self._lookup(user_id, fingerprint)
+        if manager is not None:
+            return manager
+
+        # Derive outside the lock so other users are not blocked on PBKDF2
+        manager = EncryptionManager(master_key, salt)
+        self.put(user_id, manager, fingerprint)
+        return manager
+
+    async def get_or_create_async(self, user_id: int, master_key: str, salt: Optional[bytes] = None) -> EncryptionManager:
+        """Like get_or_create, but runs key derivation on the auth CPU pool."""
+        salt = salt or os.getenv("MASTER_KEY_SALT", "default_salt").encode()
+        fingerprint = self._fingerprint(master_key, salt)
+        manager = self._lookup(user_id, fingerprint)
+        if manager is not None:
+            return manager
+
+        manager = await create_encryption_manager_async(master_key, salt)
+        self.put(user_id, manager, fingerprint)
+        return manager
+
+    def put(self, user_id: int, manager: EncryptionManager, fingerprint: Optional[bytes] = None):
+        """Store an encryption manager for a user, evicting the LRU entry if full."""
+        if fingerprint is None:
+            fingerprint = self._fingerprint(manager.master_key, manager.salt)
+        with self._lock:
+            self._entries[user_id] = (fingerprint, manager, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def evict(self, user_id: int, fingerprint: Optional[bytes] = None) -> bool:
+        """
+        Remove a user's derived key (e.g. on logout).
+
+        Args:
+            user_id: ID of the user
+            fingerprint: Only remove the entry if it was stored with this fingerprint
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or (fingerprint is not None and not hmac.compare_digest(entry[0], fingerprint)):
+                return False
+            del self._entries[user_id]
+            self.evictions += 1
+            return True
+
+    def clear(self):
+        """Remove all cached keys."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Process-wide keyring of derived user keys
+_keyring = KeyRing(
+    max_size=int(os.getenv("KEYRING_MAX_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("KEYRING_TTL_SECONDS", "3600")),
+)
+
+
+def get_keyring() -> KeyRing:
+    """Get the process-wide keyring."""
+    return _keyring
+
+
+# Encryption manager for the current request. Each request runs in its own
+# task context, so concurrent users never see each other's key.
+_current_encryption_manager: ContextVar[Optional[EncryptionManager]] = ContextVar(
+    "current_encryption_manager", default=None
+)
+
+
+def set_current_encryption_manager(manager: Optional[EncryptionManager]) -> Token:
+    """Bind an encryption manager to the current request context."""
+    return _current_encryption_manager.set(manager)
+
+
+def reset_current_encryption_manager(token: Token):
+    """Restore the encryption context that was active before ``token`` was set."""
+    _current_encryption_manager.reset(token)
+
+
+def get_current_encryption_manager() -> Optional[EncryptionManager]:
+    """Get the encryption manager bound to the current request context."""
+    return _current_encryption_manager.get()
+
+
+def _require_encryption_manager() -> EncryptionManager:
+    manager = _current_encryption_manager.get()
+    if manager is None:
         raise ValueError("Encryption manager not initialized")
-    return _global_encryption_manager.encrypt(data)
+    return manager
+
+
+def encrypt_field(data: Any) -> str:
+    """Encrypt a field using the current request's encryption manager."""
+    return _require_encryption_manager().encrypt(data)
 
 
 def decrypt_field(encrypted_data: str) -> Optional[str]:
-    """Decrypt a field using the global encryption manager."""
-    if _global_encryption_manager is None:
-        raise ValueError("Encryption manager not initialized")
-    return _global_encryption_manager.decrypt(encrypted_data)
+    """Decrypt a field using the current request's encryption manager."""
+    return _require_encryption_manager().decrypt(encrypted_data)
 
 
 def decrypt_json_field(encrypted_data: str) -> Optional[Dict]:
-    """Decrypt a JSON field using the global encryption manager."""
-    if _global_encryption_manager is None:
-        raise ValueError("Encryption manager not initialized")
-    return _global_encryption_manager.decrypt_json(encrypted_data) 
\ No newline at end of file
+    """Decrypt a JSON field using the current request's encryption manager."""
+    return _require_encryption_manager().decrypt_json(encrypted_data) 
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Reading and writing the encrypted personal fields of an Identity.
+
+Identities are stored either with one encrypted column per field, or in
+compact record mode with every field serialized into a single encrypted
+``encrypted_record`` blob. Readers accept both layouts; writers use the
+compact layout when IDENTITY_RECORD_MODE=compact or the row already has one.
+"""
+import json
+import os
+from typing import Any, Dict, Optional
+
+from app.models.identity import Identity
+from app.utils.encryption import EncryptionManager
+
+
+class IdentityRecordError(Exception):
+    """Raised when an identity's stored fields cannot be decrypted for an update."""
+
+
+def compact_record_mode() -> bool:
+    """Whether new identity writes should use the single-envelope record."""
+    return os.getenv("IDENTITY_RECORD_MODE", "fields").lower() == "compact"
+
+
+def _parse_json(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return None
+
+
+async def read_identity_fields(
+    identity: Identity,
+    manager: EncryptionManager,
+    strict: bool = False,
+) -> Dict[str, Any]:
+    """
+    Decrypt all personal fields of an identity.
+
+    Args:
+        identity: Identity row in either storage layout
+        manager: Encryption manager for the identity's owner
+        strict: Raise instead of returning None for stored values that
+            cannot be decrypted (wrong key or corrupt data)
+
+    Returns:
+        Field names from Identity.ENCRYPTED_FIELDS mapped to decrypted values
+
+    Raises:
+        IdentityRecordError: In strict mode, if a stored value cannot be decrypted
+    """
+    if identity.encrypted_record:
+        record = manager.decrypt_record(identity.encrypted_record)
+        if record is None:
+            if strict:
+                raise IdentityRecordError(f"Identity {identity.id} record cannot be decrypted")
+            record = {}
+        return {field: record.get(field) for field in Identity.ENCRYPTED_FIELDS}
+
+    # Decrypt all per-field columns in one batch off the event loop
+    ciphertexts = [getattr(identity, f"encrypted_{field}") for field in Identity.ENCRYPTED_FIELDS]
+    values = await manager.decrypt_many(ciphertexts)
+    if strict and any(ciphertext and value is None for ciphertext, value in zip(ciphertexts, values)):
+        raise IdentityRecordError(f"Identity {identity.id} has fields that cannot be decrypted")
+    data = dict(zip(Identity.ENCRYPTED_FIELDS, values))
+    data["custom_fields"] = _parse_json(data["custom_fields"])
+    return data
+
+
+async def write_identity_fields(
+    identity: Identity,
+    manager: EncryptionManager,
+    updates: Dict[str, Any],
+    compact: Optional[bool] = None,
+):
+    """
+    Encrypt and store personal fields on an identity.
+
+    Args:
+        identity: Identity row to update
+        manager: Encryption manager for the identity's owner
+        updates: Field names mapped to new values; fields not present are kept
+        compact: Force the storage layout (defaults to the configured mode, or
+            compact if the row already has a record)
+
+    Raises:
+        IdentityRecordError: If the compact record would be rebuilt from
+            stored values that cannot be decrypted; nothing is changed
+    """
+    if compact is None:
+        compact = compact_record_mode() or bool(identity.encrypted_record)
+
+    # Rewriting the record needs every stored field; never rebuild it from a failed decrypt
+    record = await read_identity_fields(identity, manager, strict=True) if compact else None
+
+    # Keep the blind indexes in step with the values they index
+    if "email" in updates:
+        identity.email_bidx = manager.blind_index(updates["email"], "email")
+    if "phone" in updates:
+        identity.phone_bidx = manager.blind_index(updates["phone"], "phone")
+
+    if not compact:
+        encrypted_values = await manager.encrypt_many(list(updates.values()))
+        for field, value in zip(updates, encrypted_values):
+            setattr(identity, f"encrypted_{field}", value)
+        return
+
+    record.update(updates)
+    identity.encrypted_record = manager.encrypt_record(
+        {field: value for field, value in record.items() if value is not None}
+    )
+    for field in Identity.ENCRYPTED_FIELDS:
+        setattr(identity, f"encrypted_{field}", None)
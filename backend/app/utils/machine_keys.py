@@ -0,0 +1,189 @@
+"""
+Machine keys: API keys that let scripts authenticate without a bcrypt login.
+
+A key looks like ``smu_<prefix>_<secret>``. The prefix is stored in a unique
+index, so authenticating is one index probe followed by an HMAC-SHA256 of the
+secret compared in constant time. The user's data key is stored wrapped with
+a key derived from the secret, so requests made with a machine key can read
+and write encrypted fields without the master key.
+
+Usage counters are not written per request. UsageRecorder collects them in
+memory and flushes them in one batched UPDATE every
+MACHINE_KEY_USAGE_FLUSH_SECONDS and on shutdown.
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.models.machine_key import MachineKey
+from app.utils.encryption import EncryptionManager
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "smu_"
+# Keys are peppered so a copy of the table alone cannot be used to check guesses
+MACHINE_KEY_PEPPER = os.getenv("MACHINE_KEY_PEPPER", os.getenv("SECRET_KEY", "your-secret-key")).encode()
+
+
+def is_machine_key(credential: str) -> bool:
+    """Whether a bearer credential is a machine key rather than a JWT."""
+    return credential.startswith(KEY_PREFIX)
+
+
+def generate_machine_key() -> Tuple[str, str, str]:
+    """
+    Generate a new machine key.
+
+    Returns:
+        The full key (shown to the user once), its prefix and its secret
+    """
+    prefix = secrets.token_hex(8)
+    secret = secrets.token_urlsafe(32)
+    return f"{KEY_PREFIX}{prefix}_{secret}", prefix, secret
+
+
+def parse_machine_key(key: str) -> Optional[Tuple[str, str]]:
+    """Split a machine key into prefix and secret, or None if malformed."""
+    if not is_machine_key(key):
+        return None
+    prefix, _, secret = key[len(KEY_PREFIX):].partition("_")
+    if len(prefix) != 16 or not secret:
+        return None
+    return prefix, secret
+
+
+def hash_secret(secret: str) -> str:
+    """Keyed hash of a machine key secret for storage."""
+    return hmac.new(MACHINE_KEY_PEPPER, secret.encode(), hashlib.sha256).hexdigest()
+
+
+def wrapping_key(secret: str) -> bytes:
+    """Derive the key that wraps the user's data key from a machine key secret."""
+    return HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=None, info=b"signmeup-machine-key-wrap"
+    ).derive(secret.encode())
+
+
+async def authenticate_machine_key(session: AsyncSession, key: str) -> Optional[Tuple[MachineKey, str]]:
+    """
+    Look up and verify a machine key.
+
+    Returns:
+        The active MachineKey row and the key's secret, or None if the key
+        is unknown, wrong, revoked or expired
+    """
+    parsed = parse_machine_key(key)
+    if parsed is None:
+        return None
+    prefix, secret = parsed
+
+    result = await session.execute(select(MachineKey).where(MachineKey.prefix == prefix))
+    machine_key = result.scalar_one_or_none()
+    if machine_key is None or not hmac.compare_digest(machine_key.secret_hash, hash_secret(secret)):
+        return None
+    if not machine_key.is_active or machine_key.revoked_at is not None:
+        return None
+    if machine_key.expires_at is not None and machine_key.expires_at.replace(tzinfo=None) <= datetime.utcnow():
+        return None
+    return machine_key, secret
+
+
+def unwrap_data_key(machine_key: MachineKey, secret: str) -> Optional[EncryptionManager]:
+    """Recover the owner's encryption manager from a verified machine key."""
+    return EncryptionManager.from_wrapped_key(machine_key.wrapped_data_key, wrapping_key(secret))
+
+
+def keyring_fingerprint(machine_key_id: int) -> bytes:
+    """
+    Keyring fingerprint for a manager unwrapped from a machine key.
+
+    Tags the keyring entry so revoking the key evicts it, while keys
+    derived from a master key at login are left alone.
+    """
+    return hashlib.sha256(f"machine_key:{machine_key_id}".encode()).digest()
+
+
+class UsageRecorder:
+    """Write-behind buffer for machine key usage_count and last_used."""
+
+    def __init__(self, flush_seconds: float = 10.0):
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[int, Tuple[int, datetime]] = {}
+        self.recorded = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.errors = 0
+
+    def record(self, key_id: int):
+        """Count one use of a key."""
+        count, _ = self._pending.get(key_id, (0, None))
+        self._pending[key_id] = (count + 1, datetime.utcnow())
+        self.recorded += 1
+
+    async def flush(self):
+        """Write buffered usage in a single batched UPDATE."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        params = [
+            {"key_id": key_id, "uses": count, "used_at": used_at}
+            for key_id, (count, used_at) in pending.items()
+        ]
+        table = MachineKey.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("key_id"))
+            .values(usage_count=table.c.usage_count + bindparam("uses"), last_used=bindparam("used_at"))
+        )
+        try:
+            async with async_session_maker() as session:
+                await session.execute(statement, params)
+                await session.commit()
+            self.flushes += 1
+            self.rows_written += len(params)
+        except Exception as e:
+            # Put the counts back so the next flush retries them
+            self.errors += 1
+            logger.error(f"Error flushing machine key usage: {str(e)}")
+            for key_id, (count, used_at) in pending.items():
+                newer_count, newer_used_at = self._pending.get(key_id, (0, used_at))
+                self._pending[key_id] = (count + newer_count, max(used_at, newer_used_at))
+
+    async def run(self):
+        """Flush periodically until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return buffer and flush counters."""
+        return {
+            "pending_keys": len(self._pending),
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+        }
+
+
+_usage_recorder: Optional[UsageRecorder] = None
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """Get the process-wide machine key usage recorder."""
+    global _usage_recorder
+    if _usage_recorder is None:
+        _usage_recorder = UsageRecorder(float(os.getenv("MACHINE_KEY_USAGE_FLUSH_SECONDS", "10")))
+    return _usage_recorder
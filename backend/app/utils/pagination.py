@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) pagination for listing endpoints.
+
+Listings are ordered by ``(created_at, id)`` and each page continues after
+the last row of the previous one, so fetching any page costs the same no
+matter how deep it is. The position is handed to clients as an opaque
+cursor in the X-Next-Cursor response header, which is absent on the last page.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.sql import Select
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor that was not issued by encode_cursor."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a row's sort key as an opaque cursor."""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def paginate(query: Select, model: Any, cursor: Optional[str], limit: int, dialect: str) -> Select:
+    """
+    Order a query by (created_at, id) and restrict it to the page after a cursor.
+
+    Args:
+        query: Select over ``model``
+        model: Model with ``created_at`` and ``id`` columns
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Page size; one extra row is fetched to detect a next page
+        dialect: Database dialect name
+
+    Returns:
+        The paginated query
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # SQLite stores CURRENT_TIMESTAMP as text without fractional seconds,
+        # so compare against the same representation
+        created_param = func.datetime(created_at) if dialect == "sqlite" else created_at
+        query = query.where(tuple_(model.created_at, model.id) > tuple_(created_param, row_id))
+    return query.order_by(model.created_at, model.id).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim the extra row fetched by paginate and build the next cursor.
+
+    Returns:
+        The rows of this page and the cursor for the next one (None on the last page)
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,230 @@
+"""
+Token-bucket rate limiting for the login endpoint.
+
+Every login attempt costs two bcrypt verifications on the auth pool, so a
+credential-stuffing burst can starve legitimate users. LoginThrottle checks
+a bucket per client IP and a bucket per account email before any database
+or hashing work, and rejected attempts get a 429 with Retry-After.
+
+Buckets live in process memory by default, split into hash-selected shards
+that are each a small LRU. The check-and-take step never awaits, so it is
+atomic on the event loop without any lock. With LOGIN_RATE_LIMIT_BACKEND=redis
+the buckets are shared by all workers and updated by a Lua script; if Redis
+is unreachable the in-memory buckets are used instead.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.cpu_pool import get_auth_pool
+from app.utils.logging import get_logger
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - redis is optional
+    redis_asyncio = None
+
+logger = get_logger(__name__)
+
+# bcrypt verifications per login attempt (password and master key)
+LOGIN_HASH_CALLS = 2
+
+
+class TokenBucketLimiter:
+    """In-memory token buckets, sharded by key."""
+
+    backend = "memory"
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float,
+                 shards: int = 16, max_keys_per_shard: int = 10000):
+        """
+        Initialize the limiter.
+
+        Args:
+            name: Name used in metrics and Redis keys
+            capacity: Burst size; a new key starts with a full bucket
+            refill_per_second: Tokens added back per second
+            shards: Number of independent bucket tables
+            max_keys_per_shard: Idle buckets beyond this are evicted, least recently used first
+
+        Raises:
+            ValueError: If capacity or refill_per_second is not positive
+        """
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError(
+                f"Rate limit '{name}' needs a positive burst and per-minute rate "
+                f"(got capacity={capacity}, refill_per_second={refill_per_second})"
+            )
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards: List["OrderedDict[str, Tuple[float, float]]"] = [OrderedDict() for _ in range(shards)]
+        self.allowed = 0
+        self.rejected = 0
+
+    def _take(self, key: str) -> float:
+        """Take a token for key; return 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        shard = self._shards[hash(key) % len(self._shards)]
+        tokens, updated_at = shard.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.refill_per_second
+
+        shard[key] = (tokens, now)
+        shard.move_to_end(key)
+        if len(shard) > self.max_keys_per_shard:
+            shard.popitem(last=False)
+        return retry_after
+
+    async def acquire(self, key: str) -> float:
+        """
+        Take a token for key.
+
+        Returns:
+            0.0 if the call is allowed, otherwise seconds until it would be
+        """
+        retry_after = self._take(key)
+        if retry_after:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """Return bucket settings and counters."""
+        return {
+            "backend": self.backend,
+            "capacity": self.capacity,
+            "refill_per_second": self.refill_per_second,
+            "keys": sum(len(shard) for shard in self._shards),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+class RedisTokenBucketLimiter(TokenBucketLimiter):
+    """Token buckets shared between workers through Redis."""
+
+    backend = "redis"
+    key_prefix = "signmeup:ratelimit:"
+
+    # Refill and take in one atomic step, using the Redis clock so workers agree
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float, url: str, **kwargs):
+        super().__init__(name, capacity, refill_per_second, **kwargs)
+        self._redis = redis_asyncio.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+        self.errors = 0
+
+    async def acquire(self, key: str) -> float:
+        try:
+            retry_after = float(await self._script(
+                keys=[f"{self.key_prefix}{self.name}:{key}"],
+                args=[self.capacity, self.refill_per_second],
+            ))
+        except Exception as e:
+            # Keep limiting with this worker's own buckets rather than failing open
+            self.errors += 1
+            logger.warning(f"Rate limit check failed, using local buckets: {str(e)}")
+            retry_after = self._take(key)
+        if retry_after:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["errors"] = self.errors
+        return stats
+
+
+class LoginThrottle:
+    """Per-IP and per-account login limits, with an estimate of the CPU they saved."""
+
+    def __init__(self, per_ip: TokenBucketLimiter, per_account: TokenBucketLimiter):
+        self.per_ip = per_ip
+        self.per_account = per_account
+        self.rejected = 0
+        self.cpu_seconds_shed = 0.0
+
+    async def check(self, client_ip: Optional[str], email: str) -> float:
+        """
+        Take a login attempt from both buckets.
+
+        Returns:
+            0.0 if the attempt may proceed, otherwise the Retry-After in seconds
+        """
+        retry_after = await self.per_ip.acquire(client_ip or "unknown")
+        if not retry_after:
+            retry_after = await self.per_account.acquire(email.strip().lower())
+        if retry_after:
+            # Each rejected attempt is bcrypt work the auth pool did not have to do
+            self.rejected += 1
+            self.cpu_seconds_shed += get_auth_pool().average_run_time() * LOGIN_HASH_CALLS
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """Return limiter counters and the estimated CPU time shed."""
+        return {
+            "per_ip": self.per_ip.stats(),
+            "per_account": self.per_account.stats(),
+            "rejected": self.rejected,
+            "cpu_seconds_shed": self.cpu_seconds_shed,
+        }
+
+
+_login_throttle: Optional[LoginThrottle] = None
+
+
+def _create_limiter(name: str, burst: str, per_minute: str, backend: str) -> TokenBucketLimiter:
+    capacity = float(os.getenv(f"LOGIN_{name.upper()}_BURST", burst))
+    refill = float(os.getenv(f"LOGIN_{name.upper()}_PER_MINUTE", per_minute)) / 60
+    if backend == "redis":
+        return RedisTokenBucketLimiter(
+            name, capacity, refill, url=os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        )
+    return TokenBucketLimiter(name, capacity, refill)
+
+
+def get_login_throttle() -> Optional[LoginThrottle]:
+    """Get the login throttle, or None if LOGIN_RATE_LIMIT_BACKEND=off."""
+    global _login_throttle
+    if _login_throttle is None:
+        backend = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory").lower()
+        if backend == "off":
+            return None
+        if backend == "redis" and redis_asyncio is None:
+            logger.warning("LOGIN_RATE_LIMIT_BACKEND=redis but the redis package is not installed; using memory")
+            backend = "memory"
+        _login_throttle = LoginThrottle(
+            per_ip=_create_limiter("ip", "20", "10", backend),
+            per_account=_create_limiter("account", "5", "5", backend),
+        )
+    return _login_throttle
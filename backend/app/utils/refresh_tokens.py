@@ -0,0 +1,145 @@
+"""
+Rotating refresh tokens backed by the refresh_sessions table.
+
+Login issues a random refresh token next to the short-lived access token.
+Exchanging it at /auth/refresh is a single indexed lookup on the token's
+SHA-256 hash, with no bcrypt or key derivation, and returns a new refresh
+token while retiring the old one.
+
+Tokens rotated from the same login form a family. Presenting a token that
+was already exchanged means it was copied, so the whole family is revoked
+and the user has to log in again. Access tokens carry their family id as
+the ``sid`` claim, and revoking a family revokes that id as well, so access
+tokens issued from the family stop working at once.
+"""
+import hashlib
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.refresh_session import RefreshSession
+from app.utils.logging import get_logger, log_security_event
+from app.utils.revocation import get_revocation_list
+
+logger = get_logger(__name__)
+
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+# Lifetime of access tokens (see routers/auth.py); a revoked sid is kept this long
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token is unknown, expired, revoked or reused."""
+
+
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage and lookup."""
+    # Tokens carry 256 bits of randomness, so a fast hash is enough
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(session: AsyncSession, user_id: int, family_id: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Create a refresh session for a user. The caller commits.
+
+    Args:
+        session: Database session
+        user_id: Owner of the token
+        family_id: Family to continue when rotating; a new one is started if None
+
+    Returns:
+        The refresh token and its family id
+    """
+    token = secrets.token_urlsafe(32)
+    family_id = family_id or uuid.uuid4().hex
+    session.add(RefreshSession(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token, family_id
+
+
+async def rotate_refresh_token(session: AsyncSession, token: str) -> Tuple[int, str, str]:
+    """
+    Exchange a refresh token for a new one in the same family and commit.
+
+    Returns:
+        The user id, the new refresh token and the family id
+
+    Raises:
+        RefreshTokenError: If the token cannot be exchanged; on reuse the
+            whole family has been revoked
+    """
+    result = await session.execute(
+        select(RefreshSession).where(RefreshSession.token_hash == hash_refresh_token(token))
+    )
+    refresh_session = result.scalar_one_or_none()
+    if refresh_session is None:
+        raise RefreshTokenError("Invalid refresh token")
+    if refresh_session.revoked_at is not None:
+        raise RefreshTokenError("Refresh token has been revoked")
+    if refresh_session.expires_at.replace(tzinfo=None) <= datetime.utcnow():
+        raise RefreshTokenError("Refresh token has expired")
+
+    # Retire the token only if nobody else has; losing the race counts as reuse
+    now = datetime.utcnow()
+    claimed = await session.execute(
+        update(RefreshSession)
+        .where(
+            (RefreshSession.id == refresh_session.id)
+            & RefreshSession.rotated_at.is_(None)
+            & RefreshSession.revoked_at.is_(None)
+        )
+        .values(rotated_at=now)
+    )
+    if claimed.rowcount != 1:
+        await revoke_refresh_family(session, refresh_session.family_id, refresh_session.user_id)
+        await session.commit()
+        log_security_event("refresh_token_reuse", user_id=refresh_session.user_id,
+                           details={"family_id": refresh_session.family_id})
+        raise RefreshTokenError("Refresh token has already been used")
+
+    new_token, family_id = issue_refresh_token(session, refresh_session.user_id, refresh_session.family_id)
+    await session.commit()
+    return refresh_session.user_id, new_token, family_id
+
+
+async def revoke_refresh_family(session: AsyncSession, family_id: str, user_id: int) -> bool:
+    """
+    Revoke every refresh token of a family and the access tokens issued with it.
+
+    The caller commits.
+
+    Returns:
+        False if the family was already revoked
+    """
+    result = await session.execute(
+        update(RefreshSession)
+        .where((RefreshSession.family_id == family_id) & RefreshSession.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    if not result.rowcount:
+        return False
+    # The newest access token of the family expires within one token lifetime
+    get_revocation_list().add(
+        session, family_id, user_id, datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return True
+
+
+async def prune_refresh_sessions(session: AsyncSession, user_id: int) -> int:
+    """Delete a user's expired refresh sessions. The caller commits."""
+    result = await session.execute(
+        delete(RefreshSession).where(
+            (RefreshSession.user_id == user_id) & (RefreshSession.expires_at < datetime.utcnow())
+        )
+    )
+    return result.rowcount or 0
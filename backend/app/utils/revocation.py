@@ -0,0 +1,191 @@
+"""
+Access token revocation with an in-memory Bloom filter in front of the database.
+
+Revoked token ids (the JWT ``jti`` claim, or the ``sid`` claim shared by
+every access token of a refresh session) are stored in the revoked_tokens
+table until the token would have expired. Each worker keeps a Bloom filter
+of those ids, so checking a token that was never revoked (almost every
+request) is a few hash computations with no database round trip. Only a
+probable hit is confirmed against the table.
+
+Workers pick up revocations made elsewhere by loading new rows every
+REVOCATION_SYNC_SECONDS. Expired rows are deleted every
+REVOCATION_PRUNE_SECONDS and the filter is rebuilt from the remaining rows.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.models.revoked_token import RevokedToken
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        """
+        Initialize the filter.
+
+        Args:
+            capacity: Number of items the filter is sized for
+            error_rate: False positive rate at capacity
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: position i is h1 + i * h2
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocationList:
+    """Revoked token ids, checked through a Bloom filter and confirmed in the database."""
+
+    def __init__(
+        self,
+        capacity: int = 100000,
+        error_rate: float = 0.001,
+        sync_seconds: float = 5.0,
+        prune_seconds: float = 3600.0,
+        session_factory: async_sessionmaker = async_session_maker,
+    ):
+        self.capacity = capacity
+        self.session_factory = session_factory
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.prune_seconds = prune_seconds
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        self._last_sync = float("-inf")
+        self._last_prune = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        self.checks = 0
+        self.probable_hits = 0
+        self.false_positives = 0
+        self.syncs = 0
+        self.pruned = 0
+
+    async def _sync(self, session: AsyncSession):
+        """Load revocations made by other workers and prune expired rows when due."""
+        if time.monotonic() - self._last_sync < self.sync_seconds:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if now - self._last_sync < self.sync_seconds:
+                return
+
+            if now - self._last_prune >= self.prune_seconds:
+                # Prune in a separate transaction so the caller's session is never committed
+                async with self.session_factory() as prune_session:
+                    result = await prune_session.execute(
+                        delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow())
+                    )
+                    await prune_session.commit()
+                self.pruned += result.rowcount or 0
+                # Bloom filters cannot forget, so start over from the remaining rows
+                self._bloom = BloomFilter(self.capacity, self.error_rate)
+                self._last_id = 0
+                self._last_prune = now
+
+            result = await session.execute(
+                select(RevokedToken.id, RevokedToken.jti)
+                .where((RevokedToken.id > self._last_id) & (RevokedToken.expires_at >= datetime.utcnow()))
+                .order_by(RevokedToken.id)
+            )
+            for row_id, jti in result.all():
+                self._bloom.add(jti)
+                self._last_id = row_id
+            self._last_sync = now
+            self.syncs += 1
+
+    async def is_revoked(self, session: AsyncSession, jti: str) -> bool:
+        """Check whether a token id has been revoked."""
+        await self._sync(session)
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+
+        self.probable_hits += 1
+        result = await session.execute(select(RevokedToken.id).where(RevokedToken.jti == jti))
+        if result.scalar_one_or_none() is None:
+            self.false_positives += 1
+            return False
+        return True
+
+    def add(self, session: AsyncSession, jti: str, user_id: int, expires_at: datetime):
+        """
+        Revoke a token id as part of the caller's transaction. The caller commits.
+
+        If the transaction is rolled back the id stays in this worker's filter,
+        which only costs a database check when a token with that id is seen.
+        """
+        session.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        self._bloom.add(jti)
+
+    async def revoke(self, session: AsyncSession, jti: str, user_id: int, expires_at: datetime):
+        """
+        Revoke a token until its expiry.
+
+        Args:
+            session: Database session (committed here)
+            jti: The token's JWT ID claim
+            user_id: Owner of the token
+            expires_at: The token's expiry (naive UTC); the row is pruned after it
+        """
+        self.add(session, jti, user_id, expires_at)
+        await session.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return filter size and check counters."""
+        return {
+            "filter_entries": self._bloom.count,
+            "filter_bits": self._bloom.size,
+            "hash_count": self._bloom.hash_count,
+            "checks": self.checks,
+            "probable_hits": self.probable_hits,
+            "false_positives": self.false_positives,
+            "syncs": self.syncs,
+            "pruned": self.pruned,
+        }
+
+
+_revocation_list: Optional[TokenRevocationList] = None
+
+
+def get_revocation_list() -> TokenRevocationList:
+    """Get the process-wide token revocation list."""
+    global _revocation_list
+    if _revocation_list is None:
+        _revocation_list = TokenRevocationList(
+            capacity=int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000")),
+            error_rate=float(os.getenv("REVOCATION_FILTER_ERROR_RATE", "0.001")),
+            sync_seconds=float(os.getenv("REVOCATION_SYNC_SECONDS", "5")),
+            prune_seconds=float(os.getenv("REVOCATION_PRUNE_SECONDS", "3600")),
+        )
+    return _revocation_list
@@ -0,0 +1,258 @@
+"""
+Short-lived cache of authenticated users for get_current_user.
+
+Every authenticated request would otherwise load the user row again. The
+cache maps a user id to a lightweight UserSnapshot (no password or master
+key hashes) for USER_CACHE_TTL_SECONDS. It lives in process memory, or in
+Redis when USER_CACHE_BACKEND=redis so all workers share it.
+
+Snapshots are dropped whenever a User row is updated or deleted through the
+ORM (after the transaction commits), so changes such as deactivation are
+seen by the next request rather than after the TTL.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.models.user import User
+from app.utils.logging import get_logger
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - redis is optional
+    redis_asyncio = None
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of the user fields request handlers need."""
+
+    id: int
+    username: str
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    is_active: bool
+    is_verified: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            is_active=user.is_active,
+            is_verified=user.is_verified,
+            created_at=user.created_at,
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat() if self.created_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, value: str) -> "UserSnapshot":
+        data = json.loads(value)
+        if data["created_at"]:
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+class UserCache:
+    """Base class holding the hit/miss counters shared by cache backends."""
+
+    backend = ""
+
+    def __init__(self, ttl_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, user_id: int) -> Optional[UserSnapshot]:
+        """Return the cached snapshot for a user, or None."""
+        raise NotImplementedError
+
+    async def set(self, snapshot: UserSnapshot):
+        """Cache a user snapshot."""
+        raise NotImplementedError
+
+    def invalidate(self, user_id: int):
+        """Drop a user's snapshot; callable from sync code such as ORM events."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class MemoryUserCache(UserCache):
+    """Bounded, TTL-expiring LRU cache of user snapshots in process memory."""
+
+    backend = "memory"
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 30.0):
+        super().__init__(ttl_seconds)
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[UserSnapshot, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, user_id: int) -> Optional[UserSnapshot]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    async def set(self, snapshot: UserSnapshot):
+        with self._lock:
+            self._entries[snapshot.id] = (snapshot, time.monotonic())
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self.invalidations += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop every snapshot."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["size"] = len(self._entries)
+        return stats
+
+
+class RedisUserCache(UserCache):
+    """User snapshot cache shared between workers through Redis."""
+
+    backend = "redis"
+    key_prefix = "signmeup:user:"
+
+    def __init__(self, url: str, ttl_seconds: float = 30.0):
+        super().__init__(ttl_seconds)
+        self._redis = redis_asyncio.from_url(url)
+        # The event loop only keeps weak references to tasks
+        self._pending: Set["asyncio.Task[None]"] = set()
+        self.errors = 0
+
+    async def get(self, user_id: int) -> Optional[UserSnapshot]:
+        try:
+            value = await self._redis.get(f"{self.key_prefix}{user_id}")
+        except Exception as e:
+            # Fall back to the database rather than failing the request
+            self.errors += 1
+            logger.warning(f"User cache lookup failed: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return UserSnapshot.from_json(value)
+
+    async def set(self, snapshot: UserSnapshot):
+        try:
+            await self._redis.set(
+                f"{self.key_prefix}{snapshot.id}", snapshot.to_json(), ex=max(1, int(self.ttl_seconds))
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"User cache store failed: {str(e)}")
+
+    def invalidate(self, user_id: int):
+        self.invalidations += 1
+        try:
+            task = asyncio.get_running_loop().create_task(self._delete(user_id))
+        except RuntimeError:
+            # No running event loop (e.g. a sync script); the TTL expires the entry
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _delete(self, user_id: int):
+        try:
+            await self._redis.delete(f"{self.key_prefix}{user_id}")
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"User cache invalidation failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["errors"] = self.errors
+        return stats
+
+
+_user_cache: Optional[UserCache] = None
+
+
+def get_user_cache() -> Optional[UserCache]:
+    """Get the configured user cache, or None if USER_CACHE_TTL_SECONDS=0."""
+    global _user_cache
+    if _user_cache is None:
+        ttl = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+        if ttl <= 0:
+            return None
+        if os.getenv("USER_CACHE_BACKEND", "memory").lower() == "redis":
+            if redis_asyncio is None:
+                logger.warning("USER_CACHE_BACKEND=redis but the redis package is not installed; using memory")
+            else:
+                _user_cache = RedisUserCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"), ttl_seconds=ttl)
+                return _user_cache
+        _user_cache = MemoryUserCache(
+            max_size=int(os.getenv("USER_CACHE_MAX_SIZE", "10000")), ttl_seconds=ttl
+        )
+    return _user_cache
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target: User):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session):
+    user_ids = session.info.pop("changed_user_ids", None)
+    cache = get_user_cache()
+    if user_ids and cache is not None:
+        for user_id in user_ids:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session):
+    session.info.pop("changed_user_ids", None)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput and stored size of each cipher suite.
+
+Encrypts and decrypts typical identity field values with every suite in
+app.utils.cipher_suites and reports operations per second and the size of
+the stored (base64 encoded) value.
+
+Usage:
+    python benchmarks/bench_cipher_suites.py [--iterations 5000]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.cipher_suites import CIPHER_SUITES
+from app.utils.encryption import EncryptionManager, derive_key
+
+# Representative identity field values
+FIELDS = {
+    "first_name": "Alex",
+    "email": "alex.johnson.pro@email.com",
+    "address_line1": "123 Tech Street, Suite 400",
+    "bio": "Experienced software developer specializing in full-stack applications. " * 6,
+    "custom_fields": json.dumps({f"question_{i}": f"answer number {i}" for i in range(40)}),
+}
+
+
+def measure(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    key = derive_key("benchmark_master_key", b"benchmark_salt")
+    print(f"{'suite':<18} {'field':<14} {'plain':>6} {'stored':>7} {'overhead':>9} {'enc ops/s':>11} {'dec ops/s':>11}")
+
+    for name in CIPHER_SUITES:
+        manager = EncryptionManager("benchmark_master_key", derived_key=key, suite=name)
+        for field, value in FIELDS.items():
+            token = manager.encrypt(value)
+            enc_rate = measure(lambda: manager.encrypt(value), args.iterations)
+            dec_rate = measure(lambda: manager.decrypt(token), args.iterations)
+            print(
+                f"{name:<18} {field:<14} {len(value):>6} {len(token):>7} {len(token) - len(value):>9} "
+                f"{enc_rate:>11,.0f} {dec_rate:>11,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
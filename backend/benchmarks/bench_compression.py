@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: stored size and decrypt latency with compress-then-encrypt.
+
+Encrypts realistic bio, notes, security question and JSON payloads with and
+without compression and reports the stored (base64 encoded) size and the
+average decrypt latency of each.
+
+Usage:
+    python benchmarks/bench_compression.py [--iterations 5000] [--suite aes-256-gcm]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.encryption import COMPRESSION_MIN_BYTES, EncryptionManager, derive_key
+
+# Representative large field values
+PAYLOADS = {
+    "short_bio": "Full-stack developer based in Austin.",
+    "bio": (
+        "Experienced software developer specializing in full-stack web applications, "
+        "cloud infrastructure and developer tooling. Previously led the platform team "
+        "at a fintech startup, where I migrated a monolith to services on Kubernetes. "
+        "Interested in distributed systems, observability and open source. "
+    ) * 4,
+    "custom_fields": json.dumps({
+        "preferred_language": "en-US",
+        "timezone": "America/Chicago",
+        "newsletter_opt_in": True,
+        "interests": ["programming", "hiking", "photography", "cooking", "travel"],
+        "profiles": {f"site_{i}": {"handle": f"alexj{i}", "verified": i % 2 == 0} for i in range(25)},
+    }),
+    "security_questions": json.dumps([
+        {"question": "What was the name of your first pet?", "answer": "Biscuit"},
+        {"question": "In what city were you born?", "answer": "Springfield"},
+        {"question": "What was the make of your first car?", "answer": "Honda Civic"},
+        {"question": "What is your mother's maiden name?", "answer": "Thompson"},
+        {"question": "What was the name of your elementary school?", "answer": "Lincoln Elementary"},
+    ]),
+    "notes": "\n".join(
+        f"{day}: signed up, confirmed email, enabled two-factor authentication, saved recovery codes."
+        for day in ("2024-01-0" + str(d) for d in range(1, 10))
+    ),
+    "additional_data": json.dumps({
+        "oauth": {"client_id": "a1b2c3d4e5f6", "redirect_uris": [f"https://app.example.com/cb/{i}" for i in range(10)]},
+        "rate_limits": {"requests_per_minute": 600, "burst": 100},
+        "webhooks": [{"url": f"https://hooks.example.com/{i}", "events": ["created", "updated", "deleted"]} for i in range(8)],
+    }),
+}
+
+
+def decrypt_latency_us(manager, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        manager.decrypt(token)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--suite", default="aes-256-gcm")
+    args = parser.parse_args()
+
+    key = derive_key("benchmark_master_key", b"benchmark_salt")
+    plain = EncryptionManager("benchmark_master_key", derived_key=key, suite=args.suite, compress=False)
+    compressed = EncryptionManager("benchmark_master_key", derived_key=key, suite=args.suite, compress=True)
+
+    print(f"suite={args.suite} threshold={COMPRESSION_MIN_BYTES} bytes")
+    print(f"{'field':<20} {'plain':>6} {'stored':>7} {'zlib':>7} {'saved':>7} {'dec us':>8} {'zlib us':>8}")
+    totals = [0, 0]
+    for field, value in PAYLOADS.items():
+        token = plain.encrypt(value)
+        ztoken = compressed.encrypt(value)
+        assert compressed.decrypt(ztoken) == value
+        totals[0] += len(token)
+        totals[1] += len(ztoken)
+        print(
+            f"{field:<20} {len(value):>6} {len(token):>7} {len(ztoken):>7} "
+            f"{1 - len(ztoken) / len(token):>7.0%} "
+            f"{decrypt_latency_us(plain, token, args.iterations):>8.1f} "
+            f"{decrypt_latency_us(compressed, ztoken, args.iterations):>8.1f}"
+        )
+    print(f"{'total':<20} {'':>6} {totals[0]:>7} {totals[1]:>7} {1 - totals[1] / totals[0]:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: signup form extraction throughput, one page.evaluate vs per-element calls.
+
+Loads each HTML fixture in benchmarks/fixtures/ into a pooled browser page
+and extracts its forms repeatedly in two ways:
+
+- evaluate: EXTRACT_FORMS_SCRIPT, a single round trip per page
+- locators: query the forms and read each field's attributes one Playwright
+  call at a time, the usual element-handle approach
+
+Reports pages per second and Playwright calls per page, and prints the
+fields found on each fixture. Needs Chromium (``playwright install chromium``).
+
+Usage:
+    python benchmarks/bench_form_extraction.py [--iterations 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app.automation.browser_pool import BrowserPool
+from app.automation.form_extraction import EXTRACT_FORMS_SCRIPT, analysis_from_extraction
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+ATTRIBUTES = ("name", "type", "id", "placeholder", "pattern", "required", "aria-label")
+
+
+async def extract_with_evaluate(page) -> int:
+    analysis_from_extraction(await page.evaluate(EXTRACT_FORMS_SCRIPT))
+    return 1
+
+
+async def extract_with_locators(page) -> int:
+    """Read the same attributes with one Playwright call per attribute."""
+    calls = 1
+    forms = await page.query_selector_all("form")
+    for form in forms:
+        controls = await form.query_selector_all("input, select, textarea")
+        calls += 1
+        for control in controls:
+            for attribute in ATTRIBUTES:
+                await control.get_attribute(attribute)
+                calls += 1
+            await control.evaluate("el => el.labels && el.labels.length ? el.labels[0].textContent : ''")
+            calls += 1
+        await form.query_selector('button[type="submit"], input[type="submit"], button:not([type])')
+        calls += 1
+    return calls
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    fixtures = sorted(FIXTURES_DIR.glob("*.html"))
+    pool = BrowserPool(browsers=1, contexts_per_browser=1)
+    try:
+        async with pool.page() as page:
+            for fixture in fixtures:
+                await page.set_content(fixture.read_text())
+                analysis = analysis_from_extraction(await page.evaluate(EXTRACT_FORMS_SCRIPT))
+                fields = ", ".join(f"{field.name}{'*' if field.required else ''}" for field in analysis.fields)
+                print(f"{fixture.name:<28} form={analysis.form_selector or '-':<18} captcha={analysis.has_captcha!s:<5} {fields}")
+            print()
+
+            print(f"{'method':<10} {'pages/s':>9} {'ms/page':>9} {'calls/page':>11}")
+            for name, extract in (("evaluate", extract_with_evaluate), ("locators", extract_with_locators)):
+                pages = calls = 0
+                elapsed = 0.0
+                for fixture in fixtures:
+                    await page.set_content(fixture.read_text())
+                    start = time.perf_counter()
+                    for _ in range(args.iterations):
+                        calls += await extract(page)
+                    elapsed += time.perf_counter() - start
+                    pages += args.iterations
+                print(f"{name:<10} {pages / elapsed:>9,.0f} {elapsed / pages * 1000:>9.2f} {calls / pages:>11.1f}")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU cost of keeping clients authenticated, with and without refresh tokens.
+
+Simulates clients whose access tokens keep expiring. Without refresh tokens
+every renewal is a POST /api/v1/auth/login (bcrypt password check, bcrypt
+master key check, key derivation); with them it is a POST /api/v1/auth/refresh.
+Requests run in-process against a throwaway SQLite database, and process CPU
+time (including the auth thread pool) is measured for each mode.
+
+Usage:
+    python benchmarks/bench_refresh.py [--renewals 200] [--concurrency 10] [--users 10]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# Point the app at a throwaway database before it is imported
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL_ASYNC"] = f"sqlite+aiosqlite:///{_tmp_dir}/bench.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every renewal comes from one address; measure hashing cost, not the login throttle
+os.environ.setdefault("LOGIN_RATE_LIMIT_BACKEND", "off")
+
+import httpx
+
+from app.database import create_tables
+from app.main import app
+from app.utils.encryption import get_keyring
+
+
+async def run(client: httpx.AsyncClient, mode: str, renewals: int, concurrency: int, users: list, email_to_id: dict):
+    # Each user renews through a login, or through a chain of refresh tokens
+    refresh_tokens = {}
+    if mode == "refresh":
+        for email in users:
+            response = await client.post("/api/v1/auth/login", json=credentials(email))
+            refresh_tokens[email] = response.json()["refresh_token"]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    per_user = max(1, renewals // len(users))
+    renewals = per_user * len(users)
+
+    async def client_session(email: str):
+        # A client renews sequentially; a refresh token chain cannot be parallel
+        for _ in range(per_user):
+            async with semaphore:
+                if mode == "login":
+                    # The cached key would normally have expired between logins
+                    get_keyring().evict(email_to_id[email])
+                    response = await client.post("/api/v1/auth/login", json=credentials(email))
+                else:
+                    response = await client.post(
+                        "/api/v1/auth/refresh", json={"refresh_token": refresh_tokens[email]}
+                    )
+                    refresh_tokens[email] = response.json()["refresh_token"]
+                assert response.status_code == 200, response.text
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    await asyncio.gather(*(client_session(email) for email in users))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    print(
+        f"{mode:<8} {renewals / elapsed:>10,.1f} {cpu:>8.2f} "
+        f"{cpu / renewals * 1000:>12.2f} {cpu / elapsed:>10.0%}"
+    )
+
+
+def credentials(email: str) -> dict:
+    return {"email": email, "password": "bench-password", "master_key": "bench-master-key"}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renewals", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10)
+    args = parser.parse_args()
+
+    await create_tables()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        users = []
+        email_to_id = {}
+        for i in range(args.users):
+            email = f"user{i}@bench.example.com"
+            response = await client.post("/api/v1/auth/register", json={
+                "username": f"user{i}", **credentials(email)
+            })
+            assert response.status_code == 200, response.text
+            users.append(email)
+            email_to_id[email] = response.json()["id"]
+
+        print(f"{'mode':<8} {'renewals/s':>10} {'CPU s':>8} {'CPU ms/renew':>12} {'CPU util':>10}")
+        for mode in ("login", "refresh"):
+            await run(client, mode, args.renewals, args.concurrency, users, email_to_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SQLite read throughput while writes are running, per pragma profile.
+
+For each profile in app.database.SQLITE_PRAGMA_PROFILES, a writer commits
+init_database-sized transactions (a user, two identities and five accounts)
+in a loop while several readers list identities and accounts. Reports reads
+per second, read latency, writes per second and "database is locked" errors.
+
+Usage:
+    python benchmarks/bench_sqlite_concurrency.py [--seconds 5] [--readers 8]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.future import select
+
+from app.database import Base, SQLITE_PRAGMA_PROFILES, create_engine_from_env
+from app.models import Account, Identity, User
+from app.utils.encryption import EncryptionManager
+
+manager = EncryptionManager("benchmark_master_key")
+VALUES = {name: manager.encrypt(f"{name} value for the benchmark") for name in (
+    "first_name", "last_name", "email", "phone", "address_line1", "city", "bio", "username", "password", "notes"
+)}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def writer(session_maker, stop: asyncio.Event, counters: dict):
+    """Commit init_database-sized transactions until stopped."""
+    while not stop.is_set():
+        n = counters["writes"] + counters["write_errors"]
+        try:
+            async with session_maker() as session:
+                user = User(email=f"user{n}@bench.local", username=f"user{n}",
+                            hashed_password="x", master_key_hash="x")
+                session.add(user)
+                await session.flush()
+                identities = [
+                    Identity(user_id=user.id, name=f"Identity {i}", **{
+                        f"encrypted_{field}": VALUES[field]
+                        for field in ("first_name", "last_name", "email", "phone", "address_line1", "city", "bio")
+                    })
+                    for i in range(2)
+                ]
+                session.add_all(identities)
+                await session.flush()
+                session.add_all([
+                    Account(identity_id=identities[i % 2].id, website_name=f"Site {i}",
+                            website_url=f"https://site{i}.example.com", website_domain=f"site{i}.example.com",
+                            encrypted_username=VALUES["username"], encrypted_email=VALUES["email"],
+                            encrypted_password=VALUES["password"], encrypted_notes=VALUES["notes"])
+                    for i in range(5)
+                ])
+                await session.commit()
+            counters["writes"] += 1
+        except OperationalError:
+            counters["write_errors"] += 1
+        await asyncio.sleep(0)
+
+
+async def reader(session_maker, stop: asyncio.Event, counters: dict, latencies: list):
+    """List a user's identities and accounts until stopped."""
+    n = 0
+    while not stop.is_set():
+        n += 1
+        start = time.perf_counter()
+        try:
+            async with session_maker() as session:
+                user_id = (await session.execute(select(func.max(User.id)))).scalar() or 1
+                user_id = max(1, user_id - n % 10)
+                await session.execute(select(Identity).where(Identity.user_id == user_id))
+                await session.execute(
+                    select(Account).join(Identity, Account.identity_id == Identity.id)
+                    .where(Identity.user_id == user_id)
+                )
+            counters["reads"] += 1
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            counters["read_errors"] += 1
+
+
+async def run_profile(profile: str, seconds: float, readers: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine_from_env(f"sqlite+aiosqlite:///{tmp}/bench.db", sqlite_profile=profile)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+        stop = asyncio.Event()
+        counters = {"reads": 0, "read_errors": 0, "writes": 0, "write_errors": 0}
+        latencies = []
+        tasks = [asyncio.create_task(writer(session_maker, stop, counters))]
+        tasks += [asyncio.create_task(reader(session_maker, stop, counters, latencies)) for _ in range(readers)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+        await engine.dispose()
+
+    print(
+        f"{profile:<12} {counters['reads'] / seconds:>9,.0f} "
+        f"{statistics.median(latencies) * 1000 if latencies else 0:>8.1f} "
+        f"{percentile(latencies, 99) * 1000 if latencies else 0:>8.1f} "
+        f"{counters['writes'] / seconds:>9,.0f} {counters['read_errors']:>8} {counters['write_errors']:>8}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'reads/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'writes/s':>9} {'r errs':>8} {'w errs':>8}")
+    for profile in SQLITE_PRAGMA_PROFILES:
+        await run_profile(profile, args.seconds, args.readers)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Load test: database query rate of authenticated requests with and without the user cache.
+
+Runs concurrent GET /api/v1/auth/me requests against the app in-process
+(on a throwaway SQLite database) and counts the SELECTs on the users table.
+The run is repeated with the cache disabled (TTL 0) and enabled.
+
+Usage:
+    python benchmarks/bench_user_cache.py [--requests 2000] [--concurrency 20] [--users 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# Point the app at a throwaway database before it is imported
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL_ASYNC"] = f"sqlite+aiosqlite:///{_tmp_dir}/bench.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+from sqlalchemy import event
+
+from app.database import async_session_maker, create_tables, engine
+from app.main import app
+from app.models import User
+from app.routers.auth import create_access_token
+from app.utils import user_cache
+
+
+async def run(requests: int, concurrency: int, tokens: list, ttl: float):
+    os.environ["USER_CACHE_TTL_SECONDS"] = str(ttl)
+    user_cache._user_cache = None
+
+    user_queries = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal user_queries
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            user_queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(tokens[i % len(tokens)])
+
+        async def worker():
+            while not queue.empty():
+                token = queue.get_nowait()
+                response = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    cache = user_cache.get_user_cache()
+    hit_rate = cache.stats()["hit_rate"] if cache else 0.0
+    label = "disabled" if ttl <= 0 else f"ttl={ttl:g}s"
+    print(
+        f"{label:<10} {requests / elapsed:>9,.0f} {user_queries:>10} "
+        f"{user_queries / elapsed:>11,.0f} {hit_rate:>9.1%}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    await create_tables()
+    async with async_session_maker() as session:
+        users = [
+            User(email=f"user{i}@bench.local", username=f"user{i}", hashed_password="x", master_key_hash="x")
+            for i in range(args.users)
+        ]
+        session.add_all(users)
+        await session.commit()
+        tokens = [create_access_token({"sub": str(user.id)}) for user in users]
+
+    print(f"{'cache':<10} {'req/s':>9} {'user SELECTs':>10} {'SELECTs/s':>11} {'hit rate':>9}")
+    for ttl in (0, 30):
+        await run(args.requests, args.concurrency, tokens, ttl)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -63,12 +63,16 @@ async def get_identities(db: AsyncSession = Depends(get_async_session)):
         result = await db.execute(select(Identity).where(Identity.user_id == 1))
         identities = result.scalars().all()
         
+        # Decrypt the display fields for every row in one batch off the event loop
+        decrypted = await demo_encryption.decrypt_many([
+            value
+            for identity in identities
+            for value in (identity.encrypted_first_name, identity.encrypted_last_name, identity.encrypted_email)
+        ])
+        
         identity_list = []
-        for identity in identities:
-            # Decrypt some fields for display
-            first_name = demo_encryption.decrypt(identity.encrypted_first_name) if identity.encrypted_first_name else ""
-            last_name = demo_encryption.decrypt(identity.encrypted_last_name) if identity.encrypted_last_name else ""
-            email = demo_encryption.decrypt(identity.encrypted_email) if identity.encrypted_email else ""
+        for index, identity in enumerate(identities):
+            first_name, last_name, email = (value or "" for value in decrypted[index * 3:index * 3 + 3])
             
             identity_list.append({
                 "id": identity.id,
@@ -96,12 +100,16 @@ async def get_accounts(db: AsyncSession = Depends(get_async_session)):
         )
         account_identity_pairs = result.all()
         
+        # Decrypt credentials for every row in one batch off the event loop
+        decrypted = await demo_encryption.decrypt_many([
+            value
+            for account, _ in account_identity_pairs
+            for value in (account.encrypted_username, account.encrypted_email, account.encrypted_notes)
+        ])
+        
         account_list = []
-        for account, identity in account_identity_pairs:
-            # Decrypt credentials for display
-            username = demo_encryption.decrypt(account.encrypted_username) if account.encrypted_username else ""
-            email = demo_encryption.decrypt(account.encrypted_email) if account.encrypted_email else ""
-            notes = demo_encryption.decrypt(account.encrypted_notes) if account.encrypted_notes else ""
+        for index, (account, identity) in enumerate(account_identity_pairs):
+            username, email, notes = (value or "" for value in decrypted[index * 3:index * 3 + 3])
             
             account_list.append({
                 "id": account.id,
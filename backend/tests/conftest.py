@@ -0,0 +1,44 @@
+"""Shared fixtures: a throwaway SQLite database created from the models."""
+import os
+
+# Keep the application's default engine off the development database
+os.environ.setdefault("DATABASE_URL_ASYNC", "sqlite+aiosqlite:///:memory:")
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import Base, create_engine_from_env
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    """Engine on a fresh SQLite file with all tables and indexes created."""
+    test_engine = create_engine_from_env(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with test_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield test_engine
+    await test_engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_maker(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def db(session_maker):
+    async with session_maker() as session:
+        yield session
+
+
+@pytest.fixture
+def explain(db):
+    """Return SQLite's EXPLAIN QUERY PLAN for a query, one step per line."""
+    async def _explain(query) -> str:
+        compiled = query.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+        result = await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        return "\n".join(row[-1] for row in result.all())
+    return _explain
@@ -0,0 +1,72 @@
+"""Account listings run as one join against identities, with no per-filter subqueries."""
+import pytest
+from fastapi import Response
+from sqlalchemy import event
+
+from app.models import Account, Identity, User
+from app.routers.accounts import list_accounts
+from app.utils.user_cache import UserSnapshot
+
+
+async def _seed(db):
+    owner = User(email="owner@example.com", username="owner", hashed_password="x", master_key_hash="x")
+    other = User(email="other@example.com", username="other", hashed_password="x", master_key_hash="x")
+    db.add_all([owner, other])
+    await db.flush()
+    work = Identity(user_id=owner.id, name="Work")
+    personal = Identity(user_id=owner.id, name="Personal")
+    foreign = Identity(user_id=other.id, name="Foreign")
+    db.add_all([work, personal, foreign])
+    await db.flush()
+
+    def account(identity, domain, is_active=True):
+        return Account(
+            identity_id=identity.id, website_name=domain, website_url=f"https://{domain}",
+            website_domain=domain, is_active=is_active,
+        )
+
+    target = account(work, "example.com")
+    db.add_all([
+        target,
+        account(work, "example.com", is_active=False),
+        account(work, "other.org"),
+        account(personal, "example.com"),
+        account(foreign, "example.com"),
+    ])
+    await db.commit()
+    return UserSnapshot.from_user(owner), work, target
+
+
+@pytest.mark.asyncio
+async def test_filtered_listing_is_a_single_join(db, engine):
+    current_user, work, target = await _seed(db)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        accounts = await list_accounts(
+            Response(), limit=20, cursor=None, website_domain="Example.com", is_active=True,
+            identity_id=work.id, current_user=current_user, db=db,
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert [account.id for account in accounts] == [target.id]
+
+    selects = [(sql, params) for sql, params in statements if sql.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 1
+    sql, params = selects[0]
+    assert "EXISTS" not in sql.upper()
+    assert "JOIN identities" in sql
+
+    connection = await db.connection()
+    plan = "\n".join(
+        row[-1] for row in (await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)).all()
+    )
+    assert "ix_identities_user_id_id" in plan
+    assert "USING INDEX ix_accounts_identity_id_" in plan
+    assert "SCAN accounts" not in plan
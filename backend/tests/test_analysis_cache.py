@@ -0,0 +1,71 @@
+"""Single-flight analysis and persistence in the analysis cache."""
+import asyncio
+
+import pytest
+from sqlalchemy.future import select
+
+from app.automation.analysis_cache import AnalysisCache
+from app.automation.web_scraper import FormField, SignupFormAnalysis
+from app.models import SignupScript
+
+
+def _analysis():
+    return SignupFormAnalysis(
+        form_selector="form", action_url="/signup", method="post", submit_button_selector="button",
+        fields=[FormField(name="email", type="email", selector="#email", required=True)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_analysis(session_maker):
+    cache = AnalysisCache(session_factory=session_maker)
+    calls = []
+
+    async def analyzer(url):
+        calls.append(url)
+        await asyncio.sleep(0.05)
+        return _analysis()
+
+    results = await asyncio.gather(
+        cache.get_or_analyze("https://www.example.com/signup", analyzer),
+        cache.get_or_analyze("https://example.com/join", analyzer),
+    )
+
+    assert len(calls) == 1
+    assert [source for _, source in results] == ["analyzed", "analyzed"]
+    assert (await cache.get_or_analyze("example.com", analyzer))[1] == "memory"
+
+    async with session_maker() as session:
+        script = (await session.execute(select(SignupScript))).scalar_one()
+    assert script.website_domain == "example.com"
+    assert script.required_fields == ["email"]
+
+    restarted = AnalysisCache(session_factory=session_maker)
+    assert (await restarted.get_or_analyze("example.com", analyzer))[1] == "database"
+
+
+@pytest.mark.asyncio
+async def test_waiters_retry_when_the_leader_is_cancelled(session_maker):
+    cache = AnalysisCache(session_factory=session_maker)
+    started = asyncio.Event()
+    calls = []
+
+    async def analyzer(url):
+        calls.append(url)
+        if len(calls) == 1:
+            started.set()
+            await asyncio.sleep(10)
+        return _analysis()
+
+    leader = asyncio.create_task(cache.get_or_analyze("https://example.com", analyzer))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_analyze("https://example.com", analyzer))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    analysis, source = await asyncio.wait_for(waiter, timeout=2)
+    assert source == "analyzed"
+    assert analysis.fields[0].name == "email"
+    assert len(calls) == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from app.database import InstrumentedQueuePool, create_engine_from_env, get_sqlite_pragmas
+
+
+@pytest.mark.asyncio
+async def test_memory_database_is_shared_between_connections():
+    engine = create_engine_from_env("sqlite+aiosqlite:///:memory:")
+    try:
+        assert isinstance(engine.pool, StaticPool)
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT x FROM t"))).scalar() == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_counters_are_per_engine(tmp_path):
+    first = create_engine_from_env(f"sqlite+aiosqlite:///{tmp_path}/first.db")
+    second = create_engine_from_env(f"sqlite+aiosqlite:///{tmp_path}/second.db")
+    try:
+        assert isinstance(first.pool, InstrumentedQueuePool)
+        for _ in range(3):
+            async with first.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        assert first.pool.checkouts == 3
+        assert second.pool.checkouts == 0
+    finally:
+        await first.dispose()
+        await second.dispose()
+
+
+def test_unknown_pragma_profile_names_the_valid_ones(monkeypatch):
+    monkeypatch.setenv("SQLITE_PRAGMA_PROFILE", "fast")
+    with pytest.raises(ValueError, match='"default", "performance"'):
+        get_sqlite_pragmas()
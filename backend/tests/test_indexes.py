@@ -0,0 +1,55 @@
+"""The listing queries and ownership lookups are served by the foreign key indexes."""
+import pytest
+from sqlalchemy.future import select
+
+from app.models import Account, ApiKey, Identity
+from app.routers.accounts import user_accounts_query
+from app.utils.pagination import paginate
+
+
+@pytest.mark.asyncio
+async def test_identity_listing_uses_user_index(explain):
+    plan = await explain(paginate(select(Identity).where(Identity.user_id == 1), Identity, None, 20, "sqlite"))
+    assert "USING INDEX ix_identities_user_id_created_at_id (user_id=?)" in plan
+    assert "SCAN identities" not in plan
+
+
+@pytest.mark.asyncio
+async def test_account_listing_joins_through_user_index(explain):
+    plan = await explain(paginate(user_accounts_query(1), Account, None, 20, "sqlite"))
+    assert "ix_identities_user_id_id (user_id=?)" in plan
+    assert "USING INDEX ix_accounts_identity_id_" in plan
+    assert "SCAN" not in plan
+
+
+@pytest.mark.asyncio
+async def test_account_ownership_lookup_uses_user_index(explain):
+    plan = await explain(user_accounts_query(1).where(Account.id == 3))
+    assert "ix_identities_user_id_id (user_id=?" in plan
+    assert "SCAN" not in plan
+
+
+@pytest.mark.asyncio
+async def test_identity_ownership_lookup_uses_primary_key(explain):
+    plan = await explain(select(Identity).where((Identity.id == 5) & (Identity.user_id == 1)))
+    assert "USING INTEGER PRIMARY KEY" in plan
+
+
+@pytest.mark.asyncio
+async def test_account_domain_lookup_uses_composite(explain):
+    plan = await explain(
+        select(Account).where((Account.identity_id == 1) & (Account.website_domain == "example.com"))
+    )
+    assert "USING INDEX ix_accounts_identity_id_website_domain (identity_id=? AND website_domain=?)" in plan
+
+
+@pytest.mark.asyncio
+async def test_signup_script_accounts_use_index(explain):
+    plan = await explain(select(Account).where(Account.signup_script_id == 1))
+    assert "USING INDEX ix_accounts_signup_script_id (signup_script_id=?)" in plan
+
+
+@pytest.mark.asyncio
+async def test_account_api_keys_use_index(explain):
+    plan = await explain(select(ApiKey).where(ApiKey.account_id == 1))
+    assert "USING INDEX ix_api_keys_account_id (account_id=?)" in plan
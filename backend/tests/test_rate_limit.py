@@ -0,0 +1,22 @@
+import pytest
+
+from app.utils.rate_limit import LoginThrottle, TokenBucketLimiter, _create_limiter
+
+
+@pytest.mark.asyncio
+async def test_rejects_once_burst_is_spent():
+    throttle = LoginThrottle(
+        per_ip=TokenBucketLimiter("ip", 5, 1 / 60),
+        per_account=TokenBucketLimiter("account", 5, 1 / 60),
+    )
+    for _ in range(5):
+        assert await throttle.check("1.2.3.4", "a@b.c") == 0
+    retry_after = await throttle.check("1.2.3.4", "a@b.c")
+    assert 0 < retry_after <= 60
+
+
+@pytest.mark.parametrize("variable", ["LOGIN_IP_PER_MINUTE", "LOGIN_IP_BURST"])
+def test_zero_limits_are_rejected(monkeypatch, variable):
+    monkeypatch.setenv(variable, "0")
+    with pytest.raises(ValueError, match="'ip'"):
+        _create_limiter("ip", "20", "10", "memory")
@@ -0,0 +1,168 @@
+"""Tiered analysis against a local fixture server, with a stub browser tier."""
+import functools
+import http.server
+import threading
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.automation.static_analyzer import TieredAnalyzer
+from app.automation.web_scraper import SignupFormAnalysis
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+
+SPA_WITH_SEARCH = """
+<html><body>
+  <form action="/search"><input name="q" type="text"></form>
+  <div id="root"></div>
+  <script src="/bundle.js"></script>
+</body></html>
+"""
+RELATIVE_ACTION = """
+<html><body>
+  <form action="create" method="post">
+    <input name="email" type="email" required>
+    <input name="password" type="password" required>
+    <button type="submit">Sign up</button>
+  </form>
+</body></html>
+"""
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def fixture_server():
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(FIXTURES_DIR))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class StubBrowser:
+    def __init__(self):
+        self.urls = []
+
+    async def __call__(self, url):
+        self.urls.append(url)
+        return SignupFormAnalysis(form_selector="", action_url="", method="post", fields=[],
+                                  submit_button_selector="")
+
+
+def _mock_site(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/terms.txt":
+        return httpx.Response(200, text="Terms of service", headers={"content-type": "text/plain"})
+    if request.url.path == "/app":
+        return httpx.Response(200, text=SPA_WITH_SEARCH, headers={"content-type": "text/html"})
+    if request.url.path == "/signup":
+        return httpx.Response(302, headers={"location": "/accounts/signup/"})
+    if request.url.path == "/accounts/signup/":
+        return httpx.Response(200, text=RELATIVE_ACTION, headers={"content-type": "text/html; charset=utf-8"})
+    return httpx.Response(404)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("page, form_selector, fields", [
+    ("simple_signup.html", "#signup-form",
+     ["full_name", "email", "username", "password", "password_confirmation", "terms", "newsletter"]),
+    ("multiple_forms.html", "body > section > div:nth-of-type(2) > form", ["nickname", "email", "password"]),
+    ("select_radio_captcha.html", "#register",
+     ["first_name", "last_name", "dob", "gender", "country", "phone", "email", "bio", "password", "accept_terms"]),
+    ("formless_inputs.html", "body", ["signup-email", "signup-password"]),
+])
+async def test_server_rendered_pages_use_static_tier(fixture_server, page, form_selector, fields):
+    browser = StubBrowser()
+    analyzer = TieredAnalyzer(browser_analyzer=browser)
+    try:
+        analysis = await analyzer.analyze(f"{fixture_server}/{page}")
+    finally:
+        await analyzer.close()
+
+    assert analysis.tier == "static"
+    assert analysis.form_selector == form_selector
+    assert [field.name for field in analysis.fields] == fields
+    assert browser.urls == []
+    assert analyzer.stats()["tiers"] == {"static": 1}
+
+
+@pytest.mark.asyncio
+async def test_static_analysis_details(fixture_server):
+    analyzer = TieredAnalyzer(browser_analyzer=StubBrowser())
+    try:
+        simple = await analyzer.analyze(f"{fixture_server}/simple_signup.html")
+        captcha = await analyzer.analyze(f"{fixture_server}/select_radio_captcha.html")
+    finally:
+        await analyzer.close()
+
+    assert simple.action_url == f"{fixture_server}/users"
+    assert simple.has_terms_checkbox and simple.requires_email_verification
+    assert captcha.has_captcha
+    fields = {field.name: field for field in captcha.fields}
+    assert fields["gender"].options == ["Female", "Male", "Other"]
+    assert fields["country"].options == ["United States", "Canada", "United Kingdom"]
+    assert fields["country"].required and not fields["dob"].required
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("page, reason", [
+    ("script_rendered.html", "no_form"),
+    ("missing.html", "http_404"),
+])
+async def test_fixture_pages_escalate(fixture_server, page, reason):
+    browser = StubBrowser()
+    analyzer = TieredAnalyzer(browser_analyzer=browser)
+    try:
+        analysis = await analyzer.analyze(f"{fixture_server}/{page}")
+    finally:
+        await analyzer.close()
+
+    assert analysis.tier == "browser"
+    assert browser.urls == [f"{fixture_server}/{page}"]
+    assert analyzer.stats()["escalations"] == {reason: 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path, reason", [
+    ("/terms.txt", "not_html"),
+    ("/app", "script_rendered"),
+])
+async def test_mocked_pages_escalate(path, reason):
+    browser = StubBrowser()
+    analyzer = TieredAnalyzer(transport=httpx.MockTransport(_mock_site), browser_analyzer=browser)
+    try:
+        analysis = await analyzer.analyze(f"https://site.test{path}")
+    finally:
+        await analyzer.close()
+
+    assert analysis.tier == "browser"
+    assert analyzer.stats()["escalations"] == {reason: 1}
+
+
+@pytest.mark.asyncio
+async def test_relative_action_resolves_against_redirected_url():
+    analyzer = TieredAnalyzer(transport=httpx.MockTransport(_mock_site), browser_analyzer=StubBrowser())
+    try:
+        analysis = await analyzer.analyze("https://site.test/signup")
+    finally:
+        await analyzer.close()
+
+    assert analysis.tier == "static"
+    assert analysis.action_url == "https://site.test/accounts/signup/create"
+
+
+@pytest.mark.asyncio
+async def test_static_tier_can_be_disabled(fixture_server):
+    browser = StubBrowser()
+    analyzer = TieredAnalyzer(browser_analyzer=browser, static_enabled=False)
+    analysis = await analyzer.analyze(f"{fixture_server}/simple_signup.html")
+
+    assert analysis.tier == "browser"
+    assert analyzer.stats()["escalations"] == {"static_disabled": 1}